@@ -0,0 +1,76 @@
+"""Micro-benchmark: indexed ReflectionMemory.suggest/add vs the original list scan.
+
+Usage: python benchmarks/bench_memory.py [--capacities 32 1000 100000] [--ops 20000]
+"""
+import argparse, os, sys, time
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # srpi from this checkout, uninstalled
+
+from srpi.experiments.reflection_timing import ReflectionMemory, Lesson
+
+class ListMemory:
+    """The original list-backed memory (pop(0) eviction, full scan per suggest), for reference."""
+    def __init__(self, capacity=32):
+        self.capacity = capacity
+        self.items = []
+
+    def add(self, s, a, info):
+        self.items.append({"state": s, "action": a, "info": info})
+        if len(self.items) > self.capacity:
+            self.items.pop(0)
+
+    def suggest(self, state_idx):
+        bias = np.zeros(4, dtype=float)
+        for it in self.items:
+            if it["state"] == state_idx and "avoid_action" in it["info"]:
+                bias[it["action"]] -= 0.5
+        return bias
+
+def workload(n_ops, n_states, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(n_states, size=n_ops).tolist(), rng.integers(4, size=n_ops).tolist()
+
+def fill(mem, capacity, n_states, info):
+    states, acts = workload(capacity, n_states, seed=1)
+    for s, a in zip(states, acts):
+        mem.add(s, a, info)
+
+def run(mem, states, acts, info):
+    for s, a in zip(states, acts):
+        mem.suggest(s)
+        mem.add(s, a, info)
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--capacities", type=int, nargs="+", default=[32, 1000, 100000])
+    p.add_argument("--ops", type=int, default=20000, help="suggest+add pairs per measurement")
+    p.add_argument("--states", type=int, default=2500, help="distinct state indices (a 50x50 grid)")
+    args = p.parse_args()
+
+    print(f"{'capacity':>9}{'list_us/op':>12}{'indexed_us/op':>15}{'speedup':>10}")
+    for cap in args.capacities:
+        states, acts = workload(args.ops, args.states)
+        # equivalence on the same stream
+        ref, new = ListMemory(cap), ReflectionMemory(cap)
+        for s, a in zip(states[:2000], acts[:2000]):
+            np.testing.assert_array_equal(ref.suggest(s), new.suggest(s))
+            ref.add(s, a, "avoid_action")
+            new.add(s, a, Lesson.AVOID_ACTION)
+
+        # the list scan is O(capacity) per op; cap its op count so large capacities finish
+        ref_ops = max(50, min(args.ops, 2_000_000 // cap))
+        ref = ListMemory(cap)
+        fill(ref, cap, args.states, "avoid_action")
+        t0 = time.perf_counter()
+        run(ref, states[:ref_ops], acts[:ref_ops], "avoid_action")
+        t_ref = (time.perf_counter() - t0) / ref_ops
+
+        new = ReflectionMemory(cap)
+        fill(new, cap, args.states, Lesson.AVOID_ACTION)
+        t0 = time.perf_counter()
+        run(new, states, acts, Lesson.AVOID_ACTION)
+        t_new = (time.perf_counter() - t0) / args.ops
+        print(f"{cap:>9}{t_ref*1e6:>12.2f}{t_new*1e6:>15.2f}{t_ref/t_new:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
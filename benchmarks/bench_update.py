@@ -0,0 +1,60 @@
+"""Micro-benchmark: batched vs per-sample MLPPolicy.update / SimpleLAC.update.
+
+Usage: python benchmarks/bench_update.py [--sizes 40 400 4000] [--repeat 5]
+"""
+import argparse, copy, os, sys, time
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # srpi from this checkout, uninstalled
+
+from srpi.agents.policy import MLPPolicy
+from srpi.lac.simple_lac import SimpleLAC
+
+PARAMS = ("W1", "b1", "W2", "b2")
+
+def make_batch(B, obs_dim, act_dim, seed=0):
+    rng = np.random.default_rng(seed)
+    obs = np.eye(obs_dim, dtype=np.float32)[rng.integers(obs_dim, size=B)]
+    acts = rng.integers(act_dim, size=B)
+    advs = rng.normal(size=B)
+    feats = rng.random((B, 5)).astype(np.float32)
+    return obs, acts, advs, feats
+
+def check_equivalent(model, batched, per_sample, *args):
+    a, b = copy.deepcopy(model), copy.deepcopy(model)
+    getattr(a, batched)(*args)
+    getattr(b, per_sample)(*args)
+    for name in PARAMS:
+        np.testing.assert_allclose(getattr(a, name), getattr(b, name), rtol=1e-6, atol=1e-10)
+
+def best_time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--sizes", type=int, nargs="+", default=[40, 400, 4000])
+    p.add_argument("--grid", type=int, default=5)
+    p.add_argument("--hidden", type=int, default=64)
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args()
+
+    obs_dim, act_dim = args.grid * args.grid, 4
+    print(f"{'model':<10}{'B':>7}{'per_sample_ms':>16}{'batched_ms':>13}{'speedup':>10}")
+    for B in args.sizes:
+        obs, acts, advs, feats = make_batch(B, obs_dim, act_dim)
+        policy = MLPPolicy(obs_dim, act_dim, hidden=args.hidden)
+        lac = SimpleLAC(input_dim=5, hidden=args.hidden)
+        check_equivalent(policy, "update", "update_per_sample", obs, acts, advs)
+        check_equivalent(lac, "update", "update_per_sample", feats, advs)
+
+        for name, model, batch in (("policy", policy, (obs, acts, advs)), ("lac", lac, (feats, advs))):
+            t_loop = best_time(lambda: model.update_per_sample(*batch), args.repeat)
+            t_vec = best_time(lambda: model.update(*batch), args.repeat)
+            print(f"{name:<10}{B:>7}{t_loop*1e3:>16.3f}{t_vec*1e3:>13.3f}{t_loop/t_vec:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
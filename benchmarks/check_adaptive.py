@@ -0,0 +1,76 @@
+"""Consistency check: adaptive episode budgets vs the fixed-budget run they cut short.
+
+For each engine (sequential, and the batched engine with a few lane counts) and exploration
+rate, runs configs/reflection_timing.yaml once with a fixed budget and once with adaptive
+stopping, and checks that every mode's adaptive rows are the first episodes of its
+fixed-budget rows, so the adaptive estimate is the fixed-budget estimate on a prefix.
+Then runs `compare` stopping on synthetic modes with equal success rate and mean return
+and checks that the rate of false "separated" stops stays within 1 - confidence despite
+the repeated looks. Exits non-zero on the first failure.
+
+Usage: python benchmarks/check_adaptive.py [--episodes 5000] [--lanes 0 64 1000] [--eps 0.1 0.9]
+                                           [--trials 200]
+"""
+import argparse, math, os, sys
+import numpy as np
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # srpi from this checkout, uninstalled
+
+from srpi.experiments.adaptive import STOP_FIELDS, run_adaptive
+from srpi.experiments.reflection_timing import _run_mode_seeded, _run_modes_compared
+from srpi.utils.config import load_config, apply_overrides
+
+def success_rate(rows):
+    return sum(r["success"] for r in rows) / max(len(rows), 1)
+
+def check_prefix(lanes, eps, episodes):
+    base = apply_overrides(load_config(os.path.join(ROOT, "configs", "reflection_timing.yaml")),
+                           {"reflect.lanes": lanes, "reflect.exploration_eps": eps,
+                            "reflect.episodes_per_mode": episodes})
+    modes = base["reflect"]["modes"]
+    fixed = {m: _run_mode_seeded(m, base)[0] for m in modes}
+    adaptive = apply_overrides(base, {"reflect.adaptive.enabled": True})
+    results = _run_modes_compared(modes, adaptive)
+    for mode, (rows, _) in zip(modes, results):
+        n = len(rows)
+        where = f"lanes={lanes} eps={eps} mode={mode}"
+        assert [r["episode"] for r in rows] == list(range(1, n + 1)), f"{where}: episodes not a prefix"
+        trimmed = [{k: v for k, v in r.items() if k not in STOP_FIELDS} for r in rows]
+        assert trimmed == fixed[mode][:n], f"{where}: rows differ from the fixed-budget run"
+        print(f"ok  lanes={lanes:<4} eps={eps:<4} {mode:<14} {n:>5} episodes ({rows[0]['stop_reason']:<9}) "
+              f"success {success_rate(rows):.3f} vs fixed {success_rate(fixed[mode]):.3f}")
+
+def equal_stream(rng, p=0.5):
+    # success ~ Bernoulli(p), return = success + N(0, 0.1): the same distribution for every mode
+    for ep in range(1, 10**9):
+        success = int(rng.random() < p)
+        yield {"episode": ep, "success": success, "return": success + 0.1 * rng.standard_normal()}
+
+def check_false_stops(trials, budget=1000, modes=2, confidence=0.95, seed=0):
+    acfg = {"min_episodes": 30, "check_every": 10, "confidence": confidence,
+            "success_ci": None, "return_ci": None, "compare": True}
+    false_stops = 0
+    for trial in range(trials):
+        streams = {m: equal_stream(np.random.default_rng([seed, trial, m])) for m in range(modes)}
+        rows = run_adaptive(streams, budget, acfg)
+        false_stops += rows[0][0]["stop_reason"] == "separated"
+    alpha, rate = 1 - confidence, false_stops / trials
+    slack = 3 * math.sqrt(alpha * (1 - alpha) / trials)
+    assert rate <= alpha + slack, f"false-stop rate {rate:.3f} above alpha={alpha:.3f} over {trials} trials"
+    print(f"ok  equal modes x{modes}: {false_stops}/{trials} false 'separated' stops "
+          f"(rate {rate:.3f}, alpha {alpha:.3f})")
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--episodes", type=int, default=5000)
+    p.add_argument("--lanes", type=int, nargs="+", default=[0, 64, 1000])
+    p.add_argument("--eps", type=float, nargs="+", default=[0.1, 0.9])
+    p.add_argument("--trials", type=int, default=200, help="equal-mode runs for the false-stop check")
+    args = p.parse_args()
+    for lanes in args.lanes:
+        for eps in args.eps:
+            check_prefix(lanes, eps, args.episodes)
+    check_false_stops(args.trials)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Equivalence check: VecGridWorld vs N independent GridWorlds on the same random actions.
+
+Compares rewards, dones, states, distances, observations and the autoreset behaviour
+(final_obs, reset state) step by step; exits non-zero on the first mismatch.
+
+Usage: python benchmarks/check_vec_env.py [--num-envs 16] [--steps 2000] [--size 7]
+"""
+import argparse, os, sys
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # srpi from this checkout, uninstalled
+
+from srpi.envs.gridworld import GridWorld, VecGridWorld, OBS_MODES
+from srpi.envs.maps import random_walls
+
+def check_equivalent(num_envs, steps, seed=0, autoreset=True, obs_mode="onehot", **env_kwargs):
+    rng = np.random.default_rng(seed)
+    vec = VecGridWorld(num_envs, autoreset=autoreset, obs_mode=obs_mode, **env_kwargs)
+    envs = [GridWorld(obs_mode=obs_mode, **env_kwargs) for _ in range(num_envs)]
+    vec_obs = vec.reset()
+    for i, env in enumerate(envs):
+        np.testing.assert_array_equal(vec_obs[i], env.reset())
+    finished = np.zeros(num_envs, dtype=bool)  # autoreset=False: envs frozen after done
+    for t in range(steps):
+        actions = rng.integers(4, size=num_envs)
+        vec_obs, vec_r, vec_d, info = vec.step(actions)
+        for i, env in enumerate(envs):
+            where = f"step {t}, env {i}"
+            if finished[i]:
+                assert vec_r[i] == 0.0 and not vec_d[i], f"{where}: frozen env moved"
+                continue
+            obs, r, done, env_info = env.step(int(actions[i]))
+            assert vec_r[i] == r, f"{where}: reward {vec_r[i]} != {r}"
+            assert vec_d[i] == done, f"{where}: done {vec_d[i]} != {done}"
+            assert info["state"][i] == env_info["state"], f"{where}: state"
+            assert info["dist_to_goal"][i] == env_info["dist_to_goal"], f"{where}: dist_to_goal"
+            if autoreset:
+                np.testing.assert_array_equal(info["final_obs"][i], obs, err_msg=f"{where}: final_obs")
+                if done:
+                    obs = env.reset()
+                    assert vec.state[i] == env.state and vec.t[i] == 0, f"{where}: autoreset"
+            elif done:
+                finished[i] = True
+            np.testing.assert_array_equal(vec_obs[i], obs, err_msg=f"{where}: obs")
+    return steps * num_envs
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--num-envs", type=int, default=16)
+    p.add_argument("--steps", type=int, default=2000)
+    p.add_argument("--size", type=int, default=7)
+    args = p.parse_args()
+
+    size = args.size
+    base = dict(size=size, start=(0, 0), goal=(size - 1, size // 2), max_steps=4 * size)
+    walls = random_walls(size, 0.25, 0, base["start"], base["goal"])
+    for obs_mode in OBS_MODES:
+        for autoreset in (True, False):
+            for name, kwargs in (("empty", base), ("walls", {**base, "walls": walls})):
+                n = check_equivalent(args.num_envs, args.steps, autoreset=autoreset, obs_mode=obs_mode, **kwargs)
+                print(f"ok  {name:<6} obs_mode={obs_mode:<7} autoreset={autoreset!s:<5} {n} env steps")
+
+if __name__ == "__main__":
+    main()
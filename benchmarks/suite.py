@@ -0,0 +1,232 @@
+"""Benchmark suite: env, policy, LAC, memory and end-to-end episode throughput.
+
+Each case is timed as the best of --repeat runs and reported as seconds per op and ops/sec.
+Results go to JSON; --compare checks them against a saved baseline and exits non-zero if any
+case is slower than the baseline by more than --tolerance.
+
+Usage:
+  python benchmarks/suite.py --out bench.json
+  python benchmarks/suite.py --compare bench.json [--tolerance 0.25] [--filter policy]
+  python benchmarks/suite.py --quick                 # smaller sizes, for a fast sanity pass
+"""
+import argparse, contextlib, io, json, os, platform, sys, tempfile, time
+import numpy as np
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # srpi from this checkout, uninstalled
+
+from srpi.envs.gridworld import GridWorld, VecGridWorld
+from srpi.envs.maps import random_walls
+from srpi.agents.policy import MLPPolicy
+from srpi.lac.simple_lac import SimpleLAC
+from srpi.lac.encoders import make_encoder
+from srpi.lac.reflection import Reflection
+from srpi.experiments.reflection_timing import MODES, ReflectionMemory, Lesson, run_mode
+from srpi.utils.config import load_config, apply_overrides
+
+# name -> (parameter grid, quick grid); each grid is a list of kwargs for the case function
+CASES = {}
+
+def case(name, grid, quick=None):
+    def register(fn):
+        CASES[name] = (fn, grid, quick or grid[:1])
+        return fn
+    return register
+
+# Each case function takes its params and returns (fn, ops): fn() is timed and does `ops` units.
+
+# large maps with random walls: step cost should not depend on the map size
+MAPS = [{"size": s, "density": 0.2} for s in (100, 500)]
+
+@case("env_step", [{"size": s} for s in (5, 20, 50)] + MAPS)
+def bench_env_step(size, steps=20_000, density=0.0):
+    walls = random_walls(size, density, 0, (0, 0), (size - 1, size - 1)) if density else None
+    env = GridWorld(size=size, goal=(size - 1, size - 1), max_steps=4 * size, walls=walls,
+                    obs_mode="coords" if walls is not None else "onehot")
+    acts = np.random.default_rng(0).integers(4, size=steps).tolist()
+    def fn():
+        env.reset()
+        for a in acts:
+            if env.step(a)[2]:
+                env.reset()
+    return fn, steps
+
+@case("vec_env_step", [{"size": 20, "num_envs": n} for n in (64, 1024)] + [{"num_envs": 1024, **m} for m in MAPS])
+def bench_vec_env_step(size, num_envs, steps=200, density=0.0):
+    walls = random_walls(size, density, 0, (0, 0), (size - 1, size - 1)) if density else None
+    env = VecGridWorld(num_envs, size=size, goal=(size - 1, size - 1), max_steps=4 * size, walls=walls,
+                       obs_mode="coords" if walls is not None else "onehot")
+    acts = np.random.default_rng(0).integers(4, size=(steps, num_envs))
+    def fn():
+        env.reset()
+        for a in acts:
+            env.step(a)
+    return fn, steps * num_envs
+
+# wide layers in both precisions, to track the float32 gain
+WIDE = [{"hidden": h, "dtype": d} for h in (512, 2048) for d in ("float64", "float32")]
+
+@case("policy_sample", [{"size": s, "hidden": h} for s in (5, 20) for h in (64, 256)]
+      + [{"size": 20, **w} for w in WIDE])
+def bench_policy_sample(size, hidden, calls=2_000, dtype="float64"):
+    obs_dim = size * size
+    policy = MLPPolicy(obs_dim, 4, hidden=hidden, dtype=dtype)
+    rng = np.random.default_rng(0)
+    obs = np.eye(obs_dim, dtype=np.float32)[rng.integers(obs_dim, size=calls)]
+    def fn():
+        for o in obs:
+            policy.sample(o, rng)
+    return fn, calls
+
+@case("policy_update", [{"hidden": h, "batch": b} for h in (64, 256) for b in (40, 400, 4000)]
+      + [{"batch": 400, **w} for w in WIDE]
+      + [{"hidden": 256, "batch": 400, "optimizer": o} for o in ("momentum", "adam")],
+      quick=[{"hidden": 64, "batch": 40}])
+def bench_policy_update(hidden, batch, size=5, dtype="float64", optimizer="sgd"):
+    obs_dim = size * size
+    policy = MLPPolicy(obs_dim, 4, hidden=hidden, dtype=dtype, optimizer=optimizer)
+    rng = np.random.default_rng(0)
+    obs = np.eye(obs_dim, dtype=np.float32)[rng.integers(obs_dim, size=batch)]
+    acts, advs = rng.integers(4, size=batch), rng.normal(size=batch)
+    return (lambda: policy.update(obs, acts, advs)), batch
+
+@case("lac_predict", [{"hidden": h, "batch": b} for h in (64, 256) for b in (40, 4000)]
+      + [{"batch": 4000, **w} for w in WIDE], quick=[{"hidden": 64, "batch": 40}])
+def bench_lac_predict(hidden, batch, dtype="float64"):
+    lac = SimpleLAC(input_dim=5, hidden=hidden, dtype=dtype)
+    x = np.random.default_rng(0).random((batch, 5)).astype(np.float32)
+    return (lambda: lac.predict(x)), batch
+
+@case("lac_update", [{"hidden": h, "batch": b} for h in (64, 256) for b in (40, 400, 4000)]
+      + [{"batch": 4000, **w} for w in WIDE], quick=[{"hidden": 64, "batch": 40}])
+def bench_lac_update(hidden, batch, dtype="float64"):
+    lac = SimpleLAC(input_dim=5, hidden=hidden, dtype=dtype)
+    rng = np.random.default_rng(0)
+    x, y = rng.random((batch, 5)).astype(np.float32), rng.normal(size=batch)
+    return (lambda: lac.update(x, y)), batch
+
+@case("lac_encode", [{"encoder": e, "cache_size": c} for e in ("features", "hashed_ngram") for c in (0, 4096)],
+      quick=[{"encoder": "hashed_ngram", "cache_size": 4096}])
+def bench_lac_encode(encoder, cache_size, batch=40, batches=100):
+    # one episode-sized batch of step reflections per call, as in training with lac.reflection: step
+    lac = SimpleLAC(encoder=make_encoder(encoder, cache_size=cache_size))
+    rng = np.random.default_rng(0)
+    episodes = [[Reflection(a, -0.01, False) for a in rng.integers(4, size=batch).tolist()] for _ in range(batches)]
+    steps, d2g = np.arange(batch), rng.integers(9, size=batch)
+    def fn():
+        for refl in episodes:
+            lac.predict(lac.encode(refl, steps, d2g))
+    return fn, batch * batches
+
+@case("memory_suggest_add", [{"capacity": c} for c in (32, 1000, 100_000)])
+def bench_memory(capacity, ops=20_000, n_states=2500):
+    rng = np.random.default_rng(0)
+    mem = ReflectionMemory(capacity)
+    for s, a in zip(rng.integers(n_states, size=capacity).tolist(), rng.integers(4, size=capacity).tolist()):
+        mem.add(s, a, Lesson.AVOID_ACTION)
+    states, acts = rng.integers(n_states, size=ops).tolist(), rng.integers(4, size=ops).tolist()
+    def fn():
+        for s, a in zip(states, acts):
+            mem.suggest(s)
+            mem.add(s, a, Lesson.AVOID_ACTION)
+    return fn, ops
+
+@case("train_episodes", [{"size": 5, "episodes": 100}, {"size": 5, "episodes": 1000, "rollout_envs": 64}],
+      quick=[{"size": 5, "episodes": 20}])
+def bench_train(size, episodes, rollout_envs=1):
+    from srpi.train import train
+    cfg = apply_overrides(load_config(os.path.join(ROOT, "configs", "gridworld_min.yaml")), {
+        "env.size": size, "env.goal": [size - 1, size - 1],
+        "train.episodes": episodes, "train.checkpoint_every": 0, "train.rollout_envs": rollout_envs,
+    })
+    def fn():
+        # fresh output dir per run so the metrics file does not keep growing
+        with tempfile.TemporaryDirectory(prefix="srpi_bench_") as out:
+            cfg["experiment"]["output_dir"] = out
+            with contextlib.redirect_stdout(io.StringIO()):
+                train(cfg)
+    return fn, episodes
+
+@case("reflection_mode", [{"mode": m, "episodes": 500} for m in MODES],
+      quick=[{"mode": m, "episodes": 60} for m in MODES])
+def bench_reflection_mode(mode, episodes):
+    cfg = load_config(os.path.join(ROOT, "configs", "reflection_timing.yaml"))
+    r = cfg["reflect"]
+    def fn():
+        run_mode(mode, cfg["env"], episodes, r["memory_capacity"], r["exploration_eps"],
+                 rng=np.random.default_rng(0), memory_policy=r.get("memory_policy", "fifo"))
+    return fn, episodes
+
+def case_key(name, params):
+    return name + "[" + ",".join(f"{k}={v}" for k, v in params.items()) + "]"
+
+def time_case(fn, repeat, warmup=1):
+    for _ in range(warmup):
+        fn()
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def run_suite(names=None, quick=False, repeat=5, pattern=None):
+    results = {}
+    for name, (make, grid, quick_grid) in CASES.items():
+        if names and name not in names:
+            continue
+        for params in (quick_grid if quick else grid):
+            key = case_key(name, params)
+            if pattern and pattern not in key:
+                continue
+            fn, ops = make(**params)
+            best = time_case(fn, repeat)
+            results[key] = {"case": name, "params": params, "ops": ops,
+                            "sec_per_op": best / ops, "ops_per_sec": ops / best}
+            print(f"{key:<52}{best / ops * 1e6:>12.3f} us/op{ops / best:>14.0f} ops/s", flush=True)
+    return results
+
+def compare(results, baseline, tolerance):
+    """Print per-case ratios against the baseline; returns the keys slower than 1 + tolerance."""
+    regressions = []
+    print(f"\n{'case':<52}{'base us/op':>12}{'now us/op':>12}{'ratio':>8}")
+    for key, res in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f"{key:<52}{'-':>12}{res['sec_per_op'] * 1e6:>12.3f}{'new':>8}")
+            continue
+        ratio = res["sec_per_op"] / base["sec_per_op"]
+        flag = ""
+        if ratio > 1 + tolerance:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<52}{base['sec_per_op'] * 1e6:>12.3f}{res['sec_per_op'] * 1e6:>12.3f}{ratio:>7.2f}x{flag}")
+    return regressions
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--cases", nargs="+", choices=list(CASES), help="run only these cases")
+    p.add_argument("--filter", type=str, default=None, help="run only keys containing this substring")
+    p.add_argument("--quick", action="store_true", help="one small size per case")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--out", type=str, default=None, help="write results as JSON")
+    p.add_argument("--compare", type=str, default=None, help="baseline JSON from a previous --out")
+    p.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    args = p.parse_args()
+
+    results = run_suite(args.cases, args.quick, args.repeat, args.filter)
+    if args.out:
+        meta = {"python": platform.python_version(), "numpy": np.__version__,
+                "machine": platform.machine(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        with open(args.out, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"Results saved to {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} case(s) slower than baseline by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
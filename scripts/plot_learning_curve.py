@@ -1,29 +1,36 @@
-import sys
-import pandas as pd
+import argparse, os, sys
+import numpy as np
 import matplotlib.pyplot as plt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # srpi from this checkout, uninstalled
+from srpi.utils.logger import iter_metrics
+from srpi.utils.stats import BinnedCurve
 
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: python scripts/plot_learning_curve.py <metrics.csv> <out.png>")
-        sys.exit(1)
-    csv_path = sys.argv[1]
-    out_path = sys.argv[2]
+    p = argparse.ArgumentParser(description="Plot return per episode from a metrics file (.csv, .npz, .parquet).")
+    p.add_argument("metrics")
+    p.add_argument("out")
+    p.add_argument("--chunksize", type=int, default=100_000, help="rows read at a time")
+    p.add_argument("--max-points", type=int, default=2000,
+                   help="episodes are averaged into at most this many bins (with a 95%% CI band)")
+    args = p.parse_args()
 
-    df = pd.read_csv(csv_path)
-    # pick episodic rows with 'return'
-    if "return" in df.columns:
-        df2 = df.dropna(subset=["return"])
-    else:
-        df2 = df
+    # stream episodic rows with 'return'; eval/summary rows have no return and are skipped
+    curve = BinnedCurve(max_bins=args.max_points)
+    for chunk in iter_metrics(args.metrics, args.chunksize, columns=["episode", "return"]):
+        curve.update(chunk["episode"], chunk["return"])
+    x, mean, ci = curve.curve()
 
     plt.figure()
-    plt.plot(df2["episode"], df2["return"], label="Return")
+    plt.plot(x, mean, label="Return")
+    if np.isfinite(ci).any():
+        # several rows per bin (coarse bins or merged seeds): 95% CI of the bin mean
+        plt.fill_between(x, mean - ci, mean + ci, alpha=0.25, label="95% CI")
     plt.xlabel("Episode")
     plt.ylabel("Return")
     plt.title("Learning Curve")
     plt.legend()
-    plt.savefig(out_path, bbox_inches="tight", dpi=150)
-    print(f"Saved plot to {out_path}")
+    plt.savefig(args.out, bbox_inches="tight", dpi=150)
+    print(f"Saved plot to {args.out}")
 
 if __name__ == "__main__":
     main()
@@ -1,20 +1,47 @@
-import sys, os, pandas as pd, matplotlib.pyplot as plt
+import os, sys, argparse, matplotlib.pyplot as plt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # srpi from this checkout, uninstalled
+from srpi.utils.logger import iter_metrics
+from srpi.utils.stats import GroupedStats
+
+COLUMNS = {"success": "success_rate", "steps": "mean_steps", "reflections": "mean_reflections", "return": "mean_return"}
+
+def results_table(agg, counts, caption=None):
+    """LaTeX summary table (one row per mode, 3 decimals) in the layout of plots/results_table.tex."""
+    if caption is None:
+        lo, hi = int(counts.min()), int(counts.max())
+        caption = f"Summary over {lo} episodes per mode." if lo == hi else f"Summary over {lo}--{hi} episodes per mode."
+    lines = [
+        r"\begin{table}[t]",
+        r"\centering",
+        rf"\caption{{{caption}}}",
+        r"\label{tab:summary}",
+        r"\begin{tabular}{lcccc}",
+        r"\toprule",
+        r"Mode & Success Rate & Mean Steps & Mean Reflections & Mean Return \\",
+        r"\midrule",
+    ]
+    for mode, row in agg.iterrows():
+        vals = " & ".join(str(round(float(row[c]), 3)) for c in COLUMNS.values())
+        lines.append(f"{mode} & {vals} \\\\")
+    lines += [r"\bottomrule", r"\end{tabular}", r"\end{table}"]
+    return "\n".join(lines) + "\n"
 
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: python scripts/plot_reflection_efficiency.py <metrics.csv> <out.png>")
-        sys.exit(1)
-    csv_path, out_path = sys.argv[1], sys.argv[2]
+    p = argparse.ArgumentParser(description="Per-mode reflection-timing plots from a metrics file (.csv, .npz, .parquet).")
+    p.add_argument("metrics")
+    p.add_argument("out", help="base .png path; _success/_efficiency/_steps are appended")
+    p.add_argument("--table", type=str, default=None, help="also write a LaTeX summary table (e.g. plots/results_table.tex)")
+    p.add_argument("--caption", type=str, default=None, help="table caption (default: episode count per mode)")
+    p.add_argument("--chunksize", type=int, default=100_000, help="rows read at a time")
+    args = p.parse_args()
+    out_path = args.out
     os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
-    df = pd.read_csv(csv_path)
-
-    # Aggregate by mode
-    agg = df.groupby("mode").agg(
-        success_rate=("success", "mean"),
-        mean_steps=("steps", "mean"),
-        mean_reflections=("reflections", "mean"),
-        mean_return=("return", "mean")
-    ).reset_index()
+
+    # Aggregate by mode, streaming the file in chunks (running mean/variance per mode)
+    stats = GroupedStats("mode", list(COLUMNS))
+    for chunk in iter_metrics(args.metrics, args.chunksize, columns=["mode", *COLUMNS]):
+        stats.update(chunk)
+    agg = stats.frame("mean").rename(columns=COLUMNS).reset_index()
     # efficiency: success per reflection (avoid div-by-zero)
     agg["efficiency"] = agg["success_rate"] / (agg["mean_reflections"].replace(0, 1))
 
@@ -49,5 +76,11 @@ def main():
           out_path.replace(".png", "_efficiency.png"),
           out_path.replace(".png", "_steps.png"))
 
+    if args.table:
+        os.makedirs(os.path.dirname(args.table) or ".", exist_ok=True)
+        with open(args.table, "w") as f:
+            f.write(results_table(agg.set_index("mode"), stats.frame("n")["success"], args.caption))
+        print(f"Saved table to {args.table}")
+
 if __name__ == "__main__":
     main()
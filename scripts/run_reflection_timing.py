@@ -1,8 +1,13 @@
-import argparse
+import argparse, os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # srpi from this checkout, uninstalled
 from srpi.experiments.reflection_timing import run_experiment
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--config", type=str, required=True)
+    parser.add_argument("--workers", type=int, default=None, help="run modes in parallel processes")
+    parser.add_argument("--profile", action="store_true", help="write per-phase timings per mode")
+    parser.add_argument("--cprofile", action="store_true", help="dump cProfile stats to <output_dir>/profile.pstats")
+    parser.add_argument("--no-cache", action="store_true", help="always run, ignoring cached results")
     args = parser.parse_args()
-    run_experiment(args.config)
+    run_experiment(args.config, args.workers, args.profile, args.cprofile, cache=not args.no_cache)
@@ -0,0 +1,70 @@
+import numpy as np
+
+class TrajectoryBuffer:
+    """
+    Preallocated per-episode storage (one row per step, up to `capacity` steps).
+    Properties return views of the first `n` rows, so the whole episode can be fed to
+    LAC training, gating and advantage blending in single vectorized calls.
+    `dtype` is used for the LAC features and predictions (match the LAC weights).
+    """
+    def __init__(self, capacity: int, obs_dim: int, feat_dim: int = 5, dtype=np.float32):
+        self.capacity = capacity
+        self._obs = np.zeros((capacity, obs_dim), dtype=np.float32)
+        self._acts = np.zeros(capacity, dtype=np.int64)
+        self._rewards = np.zeros(capacity)
+        self._feats = np.zeros((capacity, feat_dim), dtype=dtype)
+        self._lac_mean = np.zeros(capacity, dtype=dtype)
+        self._lac_var = np.zeros(capacity, dtype=dtype)
+        self.reflections = []
+        self.n = 0
+
+    def reset(self):
+        self.n = 0
+        self.reflections.clear()
+
+    def add(self, obs, act, reward, feats=None, reflection=None):
+        # feats=None leaves the row to set_feats (e.g. encoded for the whole episode at once)
+        i = self.n
+        self._obs[i] = obs
+        self._acts[i] = act
+        self._rewards[i] = reward
+        if feats is not None:
+            self._feats[i] = feats
+        self.reflections.append(reflection)
+        self.n = i + 1
+
+    def set_feats(self, feats):
+        """Store LAC inputs for every step of the episode."""
+        self._feats[:self.n] = feats
+
+    def set_lac(self, mean, var):
+        """Store LAC predictions (mean, variance) for every step of the episode."""
+        self._lac_mean[:self.n] = mean
+        self._lac_var[:self.n] = var
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def obs(self):
+        return self._obs[:self.n]
+
+    @property
+    def acts(self):
+        return self._acts[:self.n]
+
+    @property
+    def rewards(self):
+        return self._rewards[:self.n]
+
+    @property
+    def feats(self):
+        return self._feats[:self.n]
+
+    @property
+    def lac_mean(self):
+        return self._lac_mean[:self.n]
+
+    @property
+    def lac_var(self):
+        return self._lac_var[:self.n]
@@ -1,14 +1,19 @@
 import numpy as np
+from srpi.utils.checkpoint import Checkpointable
+from srpi.optim import make_optimizer
 
-class MLPPolicy:
-    def __init__(self, obs_dim: int, act_dim: int, hidden: int = 64, lr: float = 5e-3, entropy_coef: float = 0.01, kl_coef: float = 0.0):
-        rng = np.random.default_rng(0)
+class MLPPolicy(Checkpointable):
+    def __init__(self, obs_dim: int, act_dim: int, hidden: int = 64, lr: float = 5e-3, entropy_coef: float = 0.01, kl_coef: float = 0.0, seed: int = 0,
+                 dtype="float64", optimizer: str = "sgd", optimizer_kwargs: dict = None):
+        rng = np.random.default_rng(seed)
+        # parameters, gradients and activations all stay in `dtype` (float32 halves memory traffic)
+        self.dtype = np.dtype(dtype)
         # simple 2-layer MLP
-        self.W1 = rng.normal(scale=0.1, size=(obs_dim, hidden))
-        self.b1 = np.zeros(hidden)
-        self.W2 = rng.normal(scale=0.1, size=(hidden, act_dim))
-        self.b2 = np.zeros(act_dim)
-        self.lr = lr
+        self.W1 = rng.normal(scale=0.1, size=(obs_dim, hidden)).astype(self.dtype)
+        self.b1 = np.zeros(hidden, dtype=self.dtype)
+        self.W2 = rng.normal(scale=0.1, size=(hidden, act_dim)).astype(self.dtype)
+        self.b2 = np.zeros(act_dim, dtype=self.dtype)
+        self.opt = make_optimizer(optimizer, self.state_dict(), lr, **(optimizer_kwargs or {}))
         self.entropy_coef = entropy_coef
         self.kl_coef = kl_coef
         self.prev_logits = None  # for KL penalty
@@ -20,48 +25,80 @@ class MLPPolicy:
 
     def policy(self, obs):
         logits, _ = self.forward(obs)
-        # softmax
-        z = logits - logits.max()
-        probs = np.exp(z) / np.exp(z).sum()
+        # softmax (row-wise for a (B, obs_dim) batch)
+        z = logits - logits.max(axis=-1, keepdims=True)
+        e = np.exp(z)
+        probs = e / e.sum(axis=-1, keepdims=True)
         return probs, logits
 
-    def sample(self, obs):
+    def sample(self, obs, rng=None):
+        # rng: np.random.Generator; falls back to the global NumPy RNG
         probs, logits = self.policy(obs)
-        a = np.random.choice(len(probs), p=probs)
+        a = (np.random if rng is None else rng).choice(len(probs), p=probs)
         logp = np.log(probs[a] + 1e-9)
         return a, logp, probs, logits
 
+    def sample_batch(self, obs, rng=None):
+        # one action per row of a (B, obs_dim) batch via Gumbel-max (no softmax needed)
+        logits, _ = self.forward(obs)
+        logits += (np.random if rng is None else rng).gumbel(size=logits.shape)
+        return logits.argmax(axis=1)
+
     def update(self, batch_obs, batch_acts, batch_advs):
         # simple REINFORCE with baseline omitted for brevity; adds entropy bonus
-        grads_W1 = np.zeros_like(self.W1)
-        grads_b1 = np.zeros_like(self.b1)
-        grads_W2 = np.zeros_like(self.W2)
-        grads_b2 = np.zeros_like(self.b2)
+        # matrix form over the stacked (B, obs_dim) batch; same gradients as update_per_sample.
+        # Gradients are of the loss (negated objective) and land in the optimizer's buffers.
+        X = np.asarray(batch_obs, dtype=self.dtype)
+        acts = np.asarray(batch_acts, dtype=np.int64)
+        advs = np.asarray(batch_advs, dtype=self.dtype)
+        n = len(X)
+        g = self.opt.grads
+
+        logits, h = self.forward(X)
+        z = logits - logits.max(axis=1, keepdims=True)
+        e = np.exp(z)
+        probs = e / e.sum(axis=1, keepdims=True)
+
+        # entropy bonus (output layer only, as in the per-sample path): -dH/dlogits = log p + 1
+        ent_grad_logits = np.log(probs + 1e-9)
+        ent_grad_logits += 1.0
+        grad_logits = probs  # reused in place: (probs - onehot) * adv
+        grad_logits[np.arange(n), acts] -= 1.0
+        grad_logits *= advs[:, None]
+        dh = (1 - h**2) * (grad_logits @ self.W2.T)
+        ent_grad_logits *= self.entropy_coef
+        head = np.add(grad_logits, ent_grad_logits, out=ent_grad_logits)
+
+        np.matmul(X.T, dh, out=g["W1"])
+        np.sum(dh, axis=0, out=g["b1"])
+        np.matmul(h.T, head, out=g["W2"])
+        np.sum(head, axis=0, out=g["b2"])
+        self.opt.step(n)
+
+    def update_per_sample(self, batch_obs, batch_acts, batch_advs):
+        # reference implementation of update(), one forward per sample
+        self.opt.zero_grad()
+        g = self.opt.grads
 
         for obs, a, adv in zip(batch_obs, batch_acts, batch_advs):
             logits, h = self.forward(obs)
             z = logits - logits.max()
             probs = np.exp(z) / np.exp(z).sum()
-            # grad log pi(a|s) for softmax linear head
-            grad_logits = -probs
-            grad_logits[a] += 1.0
+            # grad of -log pi(a|s) for softmax linear head
+            grad_logits = probs.copy()
+            grad_logits[a] -= 1.0
             grad_logits *= adv
 
-            grads_W2 += np.outer(h, grad_logits)
-            grads_b2 += grad_logits
+            g["W2"] += np.outer(h, grad_logits)
+            g["b2"] += grad_logits
 
             dh = (1 - h**2) * (grad_logits @ self.W2.T)
-            grads_W1 += np.outer(obs, dh)
-            grads_b1 += dh
+            g["W1"] += np.outer(obs, dh)
+            g["b1"] += dh
 
             # entropy bonus
-            ent = -(probs * np.log(probs + 1e-9)).sum()
-            ent_grad_logits = -np.log(probs + 1e-9) - 1.0
-            grads_W2 += self.entropy_coef * np.outer(h, ent_grad_logits)
-            grads_b2 += self.entropy_coef * ent_grad_logits
+            ent_grad_logits = np.log(probs + 1e-9) + 1.0
+            g["W2"] += self.entropy_coef * np.outer(h, ent_grad_logits)
+            g["b2"] += self.entropy_coef * ent_grad_logits
 
-        n = len(batch_obs)
-        self.W1 += self.lr * grads_W1 / n
-        self.b1 += self.lr * grads_b1 / n
-        self.W2 += self.lr * grads_W2 / n
-        self.b2 += self.lr * grads_b2 / n
+        self.opt.step(len(batch_obs))
@@ -1,48 +1,273 @@
+import json
+from array import array
+from functools import lru_cache
 import numpy as np
 
+from srpi.envs.maps import distance_field, make_walls, map_rows
+
 ACTIONS = ["up", "down", "left", "right"]
+# (dx, dy) per action index, same order as ACTIONS
+MOVES = np.array([[-1, 0], [1, 0], [0, -1], [0, 1]], dtype=np.int64)
+
+OBS_MODES = ("onehot", "coords", "index")
+# largest grid (in states) that gets a dense one-hot table: 2048^2 float32 = 16 MB
+ONEHOT_TABLE_MAX_STATES = 2048
+
+@lru_cache(maxsize=None)
+def onehot_table(n: int) -> np.ndarray:
+    """Read-only (n, n) float32 identity; row i is the one-hot obs of state i (shared by all envs)."""
+    eye = np.eye(n, dtype=np.float32)
+    eye.flags.writeable = False
+    return eye
+
+class OneHotRows:
+    """
+    Stand-in for onehot_table on large grids: rows[idx] builds the read-only one-hot row(s)
+    of state(s) idx on demand, O(S) per row instead of O(S^2) memory for the whole table.
+    Rows are fresh arrays, so an obs stays valid after the env steps again.
+    """
+    def __init__(self, n: int):
+        self.n = n
+        self.shape = (n, n)
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, idx):
+        idx = np.asarray(idx)
+        out = np.zeros(idx.shape + (self.n,), dtype=np.float32)
+        np.put_along_axis(out, idx[..., None], 1.0, axis=-1)
+        out.flags.writeable = False
+        return out
+
+@lru_cache(maxsize=None)
+def coords_table(size: int) -> np.ndarray:
+    """Read-only (size*size, 2) float32 (x, y) / (size-1) per state index (shared by all envs)."""
+    x, y = np.divmod(np.arange(size * size), size)
+    xy = np.stack([x, y], axis=1).astype(np.float32) / max(size - 1, 1)
+    xy.flags.writeable = False
+    return xy
+
+def obs_table(size: int, obs_mode: str):
+    """Per-state obs rows for onehot / coords, None for index (the obs is the state itself)."""
+    assert obs_mode in OBS_MODES, f"obs_mode must be one of {OBS_MODES}"
+    if obs_mode == "onehot":
+        n = size * size
+        return onehot_table(n) if n <= ONEHOT_TABLE_MAX_STATES else OneHotRows(n)
+    return coords_table(size) if obs_mode == "coords" else None
+
+def state_from_obs(obs, size: int) -> int:
+    """State index of a one-hot, coords or index observation."""
+    if isinstance(obs, (int, np.integer)):
+        return int(obs)
+    if len(obs) == 2:
+        x, y = np.rint(np.asarray(obs) * max(size - 1, 1)).astype(int)
+        return int(x * size + y)
+    return int(np.argmax(obs))
 
-class GridWorld:
-    def __init__(self, size=5, start=(0,0), goal=(4,4), step_penalty=-0.01, goal_reward=1.0, max_steps=40):
+def manhattan_table(size: int, goal) -> np.ndarray:
+    """Manhattan distance to goal for every state index, shape (size*size,)."""
+    x, y = np.divmod(np.arange(size * size), size)
+    return np.abs(goal[0] - x) + np.abs(goal[1] - y)
+
+def transition_table(size: int, walls=None) -> np.ndarray:
+    """Next state index for every (state, action), shape (size*size, 4); moves off the grid or into a wall stay put."""
+    x, y = np.divmod(np.arange(size * size), size)
+    nx = np.clip(x[:, None] + MOVES[:, 0], 0, size - 1)
+    ny = np.clip(y[:, None] + MOVES[:, 1], 0, size - 1)
+    nxt = nx * size + ny
+    if walls is not None:
+        nxt = np.where(walls.ravel()[nxt], np.arange(size * size)[:, None], nxt)
+    return nxt
+
+def _int_array(a) -> array:
+    out = array("q")
+    out.frombytes(np.ascontiguousarray(a, dtype=np.int64).tobytes())
+    return out
+
+class GridMap:
+    """
+    Static tables shared by GridWorld and VecGridWorld: transitions (S, 4), distance to goal
+    (S,) and the per-state obs rows. Without walls the distance is Manhattan; with walls
+    (a (size, size) bool mask) it is the BFS shortest-path length. All O(S), so per-step
+    cost does not depend on the map size (except one-hot obs, which are S^2: use coords or
+    index on large maps; above ONEHOT_TABLE_MAX_STATES they are built per step).
+    """
+    def __init__(self, size, start, goal, walls=None, obs_mode="onehot"):
         self.size = size
         self.start = tuple(start)
         self.goal = tuple(goal)
+        self.walls = None if walls is None else np.asarray(walls, dtype=bool)
+        if self.walls is not None and self.walls.shape != (size, size):
+            raise ValueError(f"map is {self.walls.shape[0]}x{self.walls.shape[1]} but env.size is {size}")
+        for name, (x, y) in (("start", self.start), ("goal", self.goal)):
+            if not (0 <= x < size and 0 <= y < size):
+                raise ValueError(f"{name} {(x, y)} is outside the {size}x{size} grid")
+            if self.walls is not None and self.walls[x, y]:
+                raise ValueError(f"{name} {(x, y)} is a wall")
+        self.obs_mode = obs_mode
+        self.next_state = transition_table(size, self.walls)
+        self.goal_state = self.goal[0] * size + self.goal[1]
+        self.start_state = self.start[0] * size + self.start[1]
+        if self.walls is None:
+            self.dist_to_goal = manhattan_table(size, self.goal)
+        else:
+            self.dist_to_goal = distance_field(self.next_state, self.goal_state)
+            if self.dist_to_goal[self.start_state] >= size * size:
+                raise ValueError(f"goal {self.goal} is not reachable from start {self.start}")
+        self.obs_table = obs_table(size, obs_mode)
+
+    @property
+    def obs_dim(self):
+        return {"onehot": self.size * self.size, "coords": 2, "index": 1}[self.obs_mode]
+
+    def tables(self):
+        """(S, A) next-state and reward arrays plus (S, A) terminal flags (next state is the goal)."""
+        terminal = self.next_state == self.goal_state
+        reward = np.where(terminal, self.goal_reward, self.step_penalty)
+        return self.next_state, reward, terminal
+
+    def state_from_obs(self, obs):
+        return state_from_obs(obs, self.size)
+
+class GridWorld(GridMap):
+    """
+    obs_mode="onehot" returns read-only size*size float32 views into a shared identity table
+    (built row by row above ONEHOT_TABLE_MAX_STATES states; "coords" or "index" are cheaper
+    on large grids); obs_mode="coords" returns (x, y) / (size-1) as a float32 2-vector and
+    obs_mode="index" the integer state index x*size+y. Either way `state` holds the current index and info["state"] /
+    info["dist_to_goal"] describe the state after a step. `walls` is an optional
+    (size, size) bool mask (see srpi.envs.maps); moves into walls stay put.
+    """
+    def __init__(self, size=5, start=(0,0), goal=(4,4), step_penalty=-0.01, goal_reward=1.0, max_steps=40,
+                 obs_mode="onehot", walls=None):
+        super().__init__(size, start, goal, walls, obs_mode)
         self.step_penalty = step_penalty
         self.goal_reward = goal_reward
         self.max_steps = max_steps
+        # flat machine-int copies for scalar lookups in step(): as fast to index as lists,
+        # at 8 bytes per entry instead of a Python int object each
+        self._next = _int_array(self.next_state)
+        self._dist = _int_array(self.dist_to_goal)
         self.reset()
 
     def reset(self):
         self.pos = tuple(self.start)
+        self.state = self.start_state
         self.t = 0
         return self._obs()
 
     def _obs(self):
-        # one-hot position in grid
-        obs = np.zeros((self.size, self.size), dtype=np.float32)
-        obs[self.pos] = 1.0
-        return obs.flatten()  # size*size vector
+        # one-hot or coords row of the shared table, or the bare index
+        if self.obs_table is None:
+            return self.state
+        return self.obs_table[self.state]
 
     def step(self, action_idx: int):
-        action = ACTIONS[action_idx]
-        x, y = self.pos
-        if action == "up":
-            x = max(0, x-1)
-        elif action == "down":
-            x = min(self.size-1, x+1)
-        elif action == "left":
-            y = max(0, y-1)
-        else: # right
-            y = min(self.size-1, y+1)
-        self.pos = (x, y)
+        # the flat table would map a bad action into a neighbouring state's row
+        if not 0 <= action_idx < 4:
+            raise IndexError(f"action {action_idx} is out of range for {len(ACTIONS)} actions")
+        self.state = self._next[4 * self.state + action_idx]
+        self.pos = divmod(self.state, self.size)
         self.t += 1
 
         r = self.step_penalty
         done = False
-        if self.pos == self.goal:
+        if self.state == self.goal_state:
             r = self.goal_reward
             done = True
         if self.t >= self.max_steps:
             done = True
 
-        return self._obs(), r, done, {}
+        return self._obs(), r, done, {"state": self.state, "dist_to_goal": self._dist[self.state]}
+
+
+class VecGridWorld(GridMap):
+    """
+    N independent GridWorlds stepped together with one NumPy call (a transition-table
+    lookup per step). Same reward/termination rules and obs modes as GridWorld. With
+    autoreset=True, finished envs are reset in place and their terminal obs is returned in
+    info["final_obs"]; with autoreset=False they stay frozen (reward 0) until reset().
+    """
+    def __init__(self, num_envs, size=5, start=(0,0), goal=(4,4), step_penalty=-0.01, goal_reward=1.0,
+                 max_steps=40, autoreset=True, obs_mode="onehot", walls=None):
+        super().__init__(size, start, goal, walls, obs_mode)
+        self.num_envs = num_envs
+        self.step_penalty = step_penalty
+        self.goal_reward = goal_reward
+        self.max_steps = max_steps
+        self.autoreset = autoreset
+        self.state = np.zeros(num_envs, dtype=np.int64)
+        self.t = np.zeros(num_envs, dtype=np.int64)
+        self.done = np.zeros(num_envs, dtype=bool)
+        self.reset()
+
+    def reset(self):
+        self.state[:] = self.start_state
+        self.t[:] = 0
+        self.done[:] = False
+        return self._obs()
+
+    @property
+    def pos(self):
+        """(num_envs, 2) grid coordinates."""
+        return np.stack(np.divmod(self.state, self.size), axis=1)
+
+    def pos_at_goal(self):
+        return self.state == self.goal_state
+
+    def _obs(self):
+        # (num_envs,) indices, or (num_envs, obs_dim) rows of the shared table
+        return self.state.copy() if self.obs_table is None else self.obs_table[self.state]
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        if len(actions) and not 0 <= actions.min() <= actions.max() < 4:  # -1 would wrap to "right"
+            raise IndexError(f"actions must be in [0, {len(ACTIONS)}), got {actions.min()}..{actions.max()}")
+        active = ~self.done
+        self.state[active] = self.next_state[self.state[active], actions[active]]
+        self.t[active] += 1
+
+        at_goal = self.pos_at_goal()
+        rewards = np.where(at_goal, self.goal_reward, self.step_penalty)
+        rewards[~active] = 0.0
+        dones = active & (at_goal | (self.t >= self.max_steps))
+        state = self.state.copy()
+        info = {"success": dones & at_goal, "steps": self.t.copy(),
+                "state": state, "dist_to_goal": self.dist_to_goal[state]}
+
+        if self.autoreset:
+            info["final_obs"] = self._obs()
+            self.state[dones] = self.start_state
+            self.t[dones] = 0
+        else:
+            self.done |= dones
+        return self._obs(), rewards, dones, info
+
+
+@lru_cache(maxsize=8)
+def _walls(key: str):
+    # maps are parsed / generated (and BFS-checked) once per process, not once per env
+    walls = make_walls(json.loads(key))
+    if walls is not None:
+        walls.flags.writeable = False
+    return walls
+
+def make_env(env_cfg: dict, num_envs: int = None, **kwargs):
+    """Build a GridWorld (or a VecGridWorld when num_envs is given) from an `env` config section."""
+    key = {k: env_cfg.get(k) for k in ("map", "obstacles", "size", "start", "goal")}
+    if key["map"] is not None:
+        key["map"] = map_rows(key["map"])  # keyed on the file's contents, not its path
+    walls = _walls(json.dumps(key, sort_keys=True, default=list))
+    params = dict(size=env_cfg["size"],
+                  start=tuple(env_cfg["start"]),
+                  goal=tuple(env_cfg["goal"]),
+                  step_penalty=env_cfg["step_penalty"],
+                  goal_reward=env_cfg["goal_reward"],
+                  max_steps=env_cfg["max_steps"],
+                  obs_mode=env_cfg.get("obs_mode", "onehot"),
+                  walls=walls)
+    params.update(kwargs)
+    if num_envs is None:
+        return GridWorld(**params)
+    return VecGridWorld(num_envs, **params)
@@ -0,0 +1,72 @@
+"""
+GridWorld maps: wall layouts from config, a text file or a seeded random draw, and the BFS
+distance-to-goal field that replaces Manhattan distance once there are walls.
+
+    env:
+      map: [".....", ".##..", "..#..", ".....", "....."]   # rows, "#" = wall (or a path to a text file)
+      obstacles: {density: 0.2, seed: 0}                  # or random walls, regenerated until the goal is reachable
+"""
+import os
+import numpy as np
+
+WALL = "#"
+
+def parse_map(rows) -> np.ndarray:
+    """(size, size) bool wall mask from rows of text; "#" is a wall, anything else is free."""
+    rows = [r.rstrip("\n") for r in rows if r.strip()]
+    size = len(rows)
+    if any(len(r) != size for r in rows):
+        raise ValueError(f"map must be square, got {size} rows of lengths {sorted({len(r) for r in rows})}")
+    return np.array([[c == WALL for c in r] for r in rows], dtype=bool).reshape(size, size)
+
+def map_rows(spec) -> list:
+    """Rows of a map given inline or as a path to a text file with one row per line."""
+    if isinstance(spec, str):
+        with open(os.path.expanduser(spec)) as f:
+            return f.read().splitlines()
+    return list(spec)
+
+def load_map(spec) -> np.ndarray:
+    """Wall mask from a list of rows or a path to a text file with one row per line."""
+    return parse_map(map_rows(spec))
+
+def distance_field(next_state: np.ndarray, goal_state: int) -> np.ndarray:
+    """
+    Shortest-path steps to the goal for every state, by BFS outward from the goal over the
+    (S, A) transition table (grid moves are symmetric between free cells). Walls and cells
+    cut off from the goal get S, more than any path length.
+    """
+    S = len(next_state)
+    dist = np.full(S, S, dtype=np.int64)
+    dist[goal_state] = 0
+    frontier = np.array([goal_state])
+    d = 0
+    while len(frontier):
+        d += 1
+        nb = next_state[frontier].ravel()
+        nb = np.unique(nb[dist[nb] == S])
+        dist[nb] = d
+        frontier = nb
+    return dist
+
+def random_walls(size: int, density: float, seed: int, start, goal, max_tries: int = 100) -> np.ndarray:
+    """Walls drawn i.i.d. with probability `density`, redrawn until goal is reachable from start."""
+    from srpi.envs.gridworld import transition_table  # avoid a circular import
+    rng = np.random.default_rng(seed)
+    for _ in range(max_tries):
+        walls = rng.random((size, size)) < density
+        walls[tuple(start)] = walls[tuple(goal)] = False
+        dist = distance_field(transition_table(size, walls), goal[0] * size + goal[1])
+        if dist[start[0] * size + start[1]] < size * size:
+            return walls
+    raise ValueError(f"no map with the goal reachable after {max_tries} draws (density={density})")
+
+def make_walls(env_cfg: dict):
+    """Wall mask for an `env` config section (env.map or env.obstacles), or None for an empty grid."""
+    if env_cfg.get("map") is not None:
+        return load_map(env_cfg["map"])
+    obstacles = env_cfg.get("obstacles")
+    if obstacles and obstacles.get("density", 0) > 0:
+        return random_walls(env_cfg["size"], obstacles["density"], obstacles.get("seed", 0),
+                            env_cfg["start"], env_cfg["goal"])
+    return None
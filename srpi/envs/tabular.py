@@ -0,0 +1,40 @@
+"""
+Exact solutions for GridWorld, which is a small deterministic MDP: vectorized value iteration
+over the env's (S, A) next-state/reward tables, giving V*, Q*, a greedy policy table and the
+optimal episode return used for regret.
+"""
+import numpy as np
+
+def value_iteration(next_state, reward, terminal, gamma=0.99, horizon=None, tol=1e-10, max_iter=100_000):
+    """
+    Q(s,a) = R(s,a) + gamma * V(next(s,a)), with V = 0 after a terminal transition.
+    With horizon=H this is H-step backward induction (exact for time-limited episodes and
+    valid for gamma=1); it stops early once V stops changing. Returns V, Q, policy (S,).
+    """
+    V = np.zeros(next_state.shape[0])
+    cont = gamma * ~terminal
+    for _ in range(horizon or max_iter):
+        Q = reward + cont * V[next_state]
+        V_new = Q.max(axis=1)
+        if np.abs(V_new - V).max() <= tol:
+            V = V_new
+            break
+        V = V_new
+    return V, Q, Q.argmax(axis=1)
+
+def solve(env, gamma=0.99):
+    """Discounted V*, Q* and optimal policy table for a GridWorld."""
+    return value_iteration(*env.tables(), gamma=gamma)
+
+def optimal_return(env):
+    """Best achievable undiscounted episode return from env.start within env.max_steps."""
+    if env.step_penalty <= 0 and env.goal_reward >= env.step_penalty and env.start_state != env.goal_state:
+        # the shortest path is optimal, so read it off the distance field instead of running
+        # max_steps sweeps over all states; same additions (in the same order) as the backup
+        d = int(env.dist_to_goal[env.start_state])
+        v = env.goal_reward if d <= env.max_steps else 0.0
+        for _ in range(d - 1 if d <= env.max_steps else env.max_steps):
+            v = env.step_penalty + v
+        return float(v)
+    V, _, _ = value_iteration(*env.tables(), gamma=1.0, horizon=env.max_steps, tol=0.0)
+    return float(V[env.start_state])
@@ -0,0 +1,123 @@
+"""
+Adaptive episode budgets for reflection-mode comparisons. Per-episode rows of each mode are
+streamed into running statistics (Welford mean/variance of the return, Wilson interval of
+the success rate) and a mode stops with
+
+  "precision"  once its interval half-widths are within success_ci / return_ci,
+  "separated"  (compare: true) once every pair of modes has disjoint success or return
+               intervals, Bonferroni-corrected over the pairs and both statistics,
+  "budget"     after episodes_per_mode episodes.
+
+Checks start at min_episodes and repeat every check_every episodes. Every interval is also
+Bonferroni-corrected over the number of checks a run can make up to the budget, so looking
+repeatedly keeps the false-stop rate below 1 - confidence. Streams must yield rows in
+episode order (the batched engine holds back out-of-order episodes), and each mode keeps
+its own RNG stream, so its rows are the first rows a fixed-budget run would produce.
+
+    reflect:
+      adaptive:
+        enabled: true
+        min_episodes: 30
+        check_every: 10
+        confidence: 0.95
+        success_ci: 0.05    # target Wilson half-width (null: no precision stop on success)
+        return_ci: 0.05     # target half-width of the mean-return interval (null: none)
+        compare: true       # stop all modes once they are pairwise distinguishable
+"""
+import math
+from itertools import combinations
+from typing import Dict, Iterator
+
+from srpi.utils.stats import RunningStats, wilson_interval, z_value
+
+STOP_FIELDS = ["episodes_used", "stop_reason"]
+
+class ModeStats:
+    """Success count and return moments of one mode, updated one episode row at a time."""
+    __slots__ = ("successes", "ret")
+
+    def __init__(self):
+        self.successes = 0
+        self.ret = RunningStats()
+
+    @property
+    def n(self):
+        return self.ret.n
+
+    def push(self, row):
+        self.successes += row["success"]
+        self.ret.push(row["return"])
+
+    def success_interval(self, z):
+        return wilson_interval(self.successes, self.n, z)
+
+    def return_interval(self, z):
+        half = z * self.ret.sem if self.n > 1 else float("inf")
+        return self.ret.mean - half, self.ret.mean + half
+
+    def precise(self, z, success_ci=None, return_ci=None):
+        """True once every given target half-width is met (False if none is given)."""
+        if success_ci is None and return_ci is None:
+            return False
+        lo, hi = self.success_interval(z)
+        if success_ci is not None and (hi - lo) / 2 > success_ci:
+            return False
+        lo, hi = self.return_interval(z)
+        return return_ci is None or (hi - lo) / 2 <= return_ci
+
+def _disjoint(a, b):
+    return a[1] < b[0] or b[1] < a[0]
+
+def distinguishable(a: ModeStats, b: ModeStats, z) -> bool:
+    """Success-rate or mean-return intervals of the two modes do not overlap."""
+    return (_disjoint(a.success_interval(z), b.success_interval(z))
+            or _disjoint(a.return_interval(z), b.return_interval(z)))
+
+def max_looks(budget: int, min_episodes: int, check_every: int) -> int:
+    """Number of checks run_adaptive can make per mode: at min_episodes, then every check_every up to budget."""
+    if budget <= min_episodes:
+        return 1
+    return 1 + math.ceil((budget - min_episodes) / check_every)
+
+def run_adaptive(streams: Dict[str, Iterator[dict]], budget: int, acfg: dict):
+    """
+    Pull rows from each mode's stream under the stopping rules above. Returns
+    {mode: rows}, each row tagged with the mode's episodes_used and stop_reason.
+    Modes advance check_every episodes at a time, so `compare` sees them at equal counts.
+    """
+    min_eps = acfg.get("min_episodes", 30)
+    check_every = max(1, acfg.get("check_every", 10))
+    confidence = acfg.get("confidence", 0.95)
+    success_ci, return_ci = acfg.get("success_ci"), acfg.get("return_ci")
+    compare = acfg.get("compare", True) and len(streams) > 1
+    looks = max_looks(budget, min_eps, check_every)
+    z = z_value(confidence, looks)
+    z_pair = z_value(confidence, len(streams) * (len(streams) - 1) * looks)  # pairs x 2 statistics
+
+    stats = {m: ModeStats() for m in streams}
+    rows = {m: [] for m in streams}
+    reason = {}
+    while len(reason) < len(streams):
+        for m, stream in streams.items():
+            if m in reason:
+                continue
+            goal = min(budget, max(min_eps, len(rows[m]) + check_every))
+            for row in stream:
+                rows[m].append(row)
+                stats[m].push(row)
+                if len(rows[m]) >= goal:
+                    break
+            if len(rows[m]) < goal or len(rows[m]) >= budget:
+                reason[m] = "budget"  # stream exhausted or budget spent
+            elif stats[m].precise(z, success_ci, return_ci):
+                reason[m] = "precision"
+        if compare and len(reason) < len(streams) and min(s.n for s in stats.values()) >= min_eps:
+            if all(distinguishable(stats[a], stats[b], z_pair) for a, b in combinations(streams, 2)):
+                for m in streams:
+                    reason.setdefault(m, "separated")
+
+    for m, mode_rows in rows.items():
+        for row in mode_rows:
+            row["episodes_used"] = len(mode_rows)
+            row["stop_reason"] = reason[m]
+    return rows
@@ -1,72 +1,172 @@
 import os, csv, random
+from collections import deque, OrderedDict
+from enum import IntEnum
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 
-from srpi.envs.gridworld import GridWorld, ACTIONS
+from srpi.envs.gridworld import make_env, transition_table, manhattan_table, state_from_obs, ACTIONS
+from srpi.envs.tabular import optimal_return
+from srpi.lac.reflection import Reflection
+from srpi.utils.misc import make_rng
+from srpi.utils.profiling import PhaseTimer, run_profiled
+from srpi.utils.cache import cached_run
+from srpi.experiments.adaptive import run_adaptive, STOP_FIELDS
+
+MODES = ("no_reflection", "per_step", "failure_only", "success_only")
+FIELDNAMES = ["mode", "episode", "success", "steps", "return", "reflections", "regret"]
+
+class Lesson(IntEnum):
+    """Lesson types stored in ReflectionMemory (int codes instead of free text)."""
+    NOTE = 0          # stored but carries no action bias
+    AVOID_ACTION = 1  # discourage repeating `action` in `state`
+
+AVOID_PENALTY = 0.5
+_AVOID = int(Lesson.AVOID_ACTION)  # plain-int code for the hot path
+_NO_BIAS = np.zeros(4)
+_NO_BIAS.flags.writeable = False
 
 class ReflectionMemory:
-    """A tiny text-memory that stores simple 'lessons' and can bias actions."""
-    def __init__(self, capacity=32):
+    """
+    A tiny lesson memory that can bias actions. Keeps a per-state bias index in step with
+    a bounded store, so suggest() is one dict lookup. Eviction is "fifo" (oldest lesson
+    first) or "lru" (oldest lesson of the least recently suggested/added state).
+    """
+    def __init__(self, capacity=32, policy="fifo"):
+        assert policy in ("fifo", "lru"), "policy must be 'fifo' or 'lru'"
         self.capacity = capacity
-        self.items = []
+        self.policy = policy
+        self._bias = {}  # state -> (4,) accumulated bias
+        self._count = {}  # state -> number of stored lessons
+        if policy == "fifo":
+            self._fifo = deque()  # (state, action, kind)
+        else:
+            self._lru = OrderedDict()  # state -> deque of (action, kind), least recent first
+        self._size = 0
 
-    def add(self, s, a, info:str):
-        self.items.append({"state": s, "action": a, "info": info})
-        if len(self.items) > self.capacity:
-            self.items.pop(0)
+    def __len__(self):
+        return self._size
+
+    @property
+    def items(self):
+        """Stored lessons, oldest first (fifo) / least recent state first (lru)."""
+        if self.policy == "fifo":
+            triples = list(self._fifo)
+        else:
+            triples = [(s, a, k) for s, q in self._lru.items() for a, k in q]
+        return [{"state": s, "action": a, "info": Lesson(k).name.lower()} for s, a, k in triples]
+
+    def add(self, s, a, info=Lesson.AVOID_ACTION):
+        # info: a Lesson, or legacy text ("avoid_action" in the text -> AVOID_ACTION)
+        if isinstance(info, str):
+            info = Lesson.AVOID_ACTION if "avoid_action" in info else Lesson.NOTE
+        kind = int(info)
+        if self.policy == "fifo":
+            self._fifo.append((s, a, kind))
+        else:
+            q = self._lru.get(s)
+            if q is None:
+                q = self._lru[s] = deque()
+            else:
+                self._lru.move_to_end(s)
+            q.append((a, kind))
+        self._count[s] = self._count.get(s, 0) + 1
+        if kind == _AVOID:
+            bias = self._bias.get(s)
+            if bias is None:
+                bias = self._bias[s] = np.zeros(4)
+            bias[a] -= AVOID_PENALTY
+        self._size += 1
+        if self._size > self.capacity:
+            self._evict()
+
+    def _evict(self):
+        if self.policy == "fifo":
+            s, a, kind = self._fifo.popleft()
+        else:
+            s, q = next(iter(self._lru.items()))
+            a, kind = q.popleft()
+            if not q:
+                del self._lru[s]
+        self._size -= 1
+        self._count[s] -= 1
+        if self._count[s] == 0:
+            del self._count[s]
+            self._bias.pop(s, None)
+        elif kind == _AVOID:
+            self._bias[s][a] += AVOID_PENALTY
 
     def suggest(self, state_idx):
-        """Return a small bias vector over actions based on 'lessons' that match state index."""
-        # Very naive: if we have a lesson for this state, discourage repeating the same failed action
-        bias = np.zeros(4, dtype=float)
-        for it in self.items:
-            if it["state"] == state_idx and "avoid_action" in it["info"]:
-                a_bad = it["action"]
-                bias[a_bad] -= 0.5
-        return bias
-
-def manhattan_policy(obs_flat, size):
-    """Scripted greedy policy: move toward goal by Manhattan distance."""
-    idx = int(np.argmax(obs_flat))
-    x, y = divmod(idx, size)
-    gx, gy = size-1, size-1
-    # compute deltas
-    dx = gx - x
-    dy = gy - y
-    # Prefer moving along the larger absolute difference first
+        """Return a read-only view of the bias vector over actions for lessons matching state index."""
+        if self.policy == "lru" and state_idx in self._lru:
+            self._lru.move_to_end(state_idx)
+        bias = self._bias.get(state_idx)
+        if bias is None:
+            return _NO_BIAS
+        view = bias.view()  # no copy; writes through it raise instead of corrupting the memory
+        view.flags.writeable = False
+        return view
+
+def greedy_policy_table(next_state, dist_to_goal):
+    """(S, 4) scripted-policy probabilities: a softmax favouring every action that gets closer to the goal."""
     # Return a probability over 4 actions (up,down,left,right) as a softmax on scores
-    scores = np.array([0.0,0.0,0.0,0.0])
-    if dx < 0: scores[0] += 1.0   # up
-    if dx > 0: scores[1] += 1.0   # down
-    if dy < 0: scores[2] += 1.0   # left
-    if dy > 0: scores[3] += 1.0   # right
+    scores = np.zeros(next_state.shape)
+    scores += dist_to_goal[next_state] < dist_to_goal[:, None]
     # mild softness
-    probs = np.exp(scores) / np.exp(scores).sum()
+    probs = np.exp(scores) / np.exp(scores).sum(axis=1, keepdims=True)
+    probs.flags.writeable = False
     return probs
 
+def env_policy_table(env):
+    """greedy_policy_table for an env's own tables (BFS distance on maps with walls)."""
+    if env.walls is None:
+        return manhattan_policy_table(env.size, env.goal)
+    return greedy_policy_table(env.next_state, env.dist_to_goal)
+
+@lru_cache(maxsize=None)
+def manhattan_policy_table(size, goal=None):
+    """(S, 4) scripted-policy probabilities on an empty grid, built once per (size, goal) (read-only)."""
+    goal = (size-1, size-1) if goal is None else tuple(goal)
+    return greedy_policy_table(transition_table(size), manhattan_table(size, goal))
+
+def manhattan_policy(obs_flat, size, goal=None):
+    """Scripted greedy policy: move toward goal by Manhattan distance (accepts one-hot, coords or index obs)."""
+    return manhattan_policy_table(size, goal)[state_index_from_obs(obs_flat, size)].copy()
+
 def reflection_string(event:str, state_idx:int, action:int, reward:float, done:bool):
-    # Minimal reflection text
-    base = f"event={event} state={state_idx} action={action} reward={reward:.2f} done={done}"
-    if reward > 0 and done:
-        base += " reached_goal"
-    if reward < 0:
-        base += " step_penalty"
-    return base
+    # Minimal reflection, as a record; str() renders the text
+    return Reflection(action, reward, done, event=event, state=state_idx)
 
 def state_index_from_obs(obs_flat, size):
-    return int(np.argmax(obs_flat))
+    return state_from_obs(obs_flat, size)
 
 
-def run_mode(mode:str, env_cfg:dict, episodes:int, memory_capacity:int, eps:float, csv_writer):
-    env = GridWorld(size=env_cfg["size"],
-                    start=tuple(env_cfg["start"]),
-                    goal=tuple(env_cfg["goal"]),
-                    step_penalty=env_cfg["step_penalty"],
-                    goal_reward=env_cfg["goal_reward"],
-                    max_steps=env_cfg["max_steps"])
-    mem = ReflectionMemory(capacity=memory_capacity)
+def run_mode(mode:str, env_cfg:dict, episodes:int, memory_capacity:int, eps:float, csv_writer=None, rng=None,
+             memory_policy:str="fifo", timer=None):
+    """Run `episodes` episodes of one mode; returns the per-episode rows (also written to csv_writer if given)."""
+    rows = list(iter_mode(mode, env_cfg, episodes, memory_capacity, eps, rng, memory_policy, timer))
+    if csv_writer is not None:
+        csv_writer.writerows(rows)
+    return rows
+
+def iter_mode(mode:str, env_cfg:dict, episodes:int, memory_capacity:int, eps:float, rng=None,
+              memory_policy:str="fifo", timer=None):
+    """run_mode as a generator: yields each episode's row as it finishes, so callers can stop early."""
+    rng = np.random.default_rng() if rng is None else rng
+    timer = timer or PhaseTimer()
+    phase, lap = timer.phase, timer.lap
+    # the scripted agent only needs the position, so skip one-hot observations entirely
+    env = make_env(env_cfg, obs_mode="index")
+    mem = ReflectionMemory(capacity=memory_capacity, policy=memory_policy)
+    # scripted policy as lookup tables: per-state base logits and their argmax
+    base_logits = np.log(env_policy_table(env) + 1e-9)
+    base_action = base_logits.argmax(axis=1).tolist()
+    opt_return = optimal_return(env)
 
     for ep in range(1, episodes+1):
-        obs = env.reset()
+        lap()
+        obs = env.reset()  # state index
+        d2g = int(env.dist_to_goal[obs])
         done = False
         steps = 0
         reflections = 0
@@ -74,22 +174,17 @@ def run_mode(mode:str, env_cfg:dict, episodes:int, memory_capacity:int, eps:floa
         success = 0
 
         while not done:
-            base_probs = manhattan_policy(obs, env.size)
-            # bias from memory (disabled in no_reflection)
-            if mode == "no_reflection":
-                bias = 0.0
-                logits = np.log(base_probs + 1e-9)
-            else:
-                bias = mem.suggest(state_index_from_obs(obs, env.size))
-                logits = np.log(base_probs + 1e-9) + bias
-
-            # eps-greedy exploration
-            if np.random.rand() < eps:
-                a = np.random.randint(4)
+            # eps-greedy exploration over the scripted policy + memory bias (no bias in no_reflection)
+            if rng.random() < eps:
+                a = int(rng.integers(4))
+            elif mode == "no_reflection":
+                a = base_action[obs]
             else:
-                a = int(np.argmax(logits))
+                a = int(np.argmax(base_logits[obs] + mem.suggest(obs)))
+            lap("policy")
 
             next_obs, r, done, info = env.step(a)
+            lap("env_step")
             total_r += r
             steps += 1
 
@@ -106,56 +201,266 @@ def run_mode(mode:str, env_cfg:dict, episodes:int, memory_capacity:int, eps:floa
 
             if reflect_now and mode != "no_reflection":
                 reflections += 1
-                s_idx = state_index_from_obs(obs, env.size)
                 # record a simple "avoid" lesson when moving didn't change distance (heuristic)
-                def d2g(ob):
-                    i = int(np.argmax(ob)); x,y = divmod(i, env.size); gx,gy = env.size-1, env.size-1
-                    return abs(gx-x)+abs(gy-y)
-                if d2g(next_obs) >= d2g(obs):
-                    mem.add(s_idx, a, "avoid_action")
+                if info["dist_to_goal"] >= d2g:
+                    mem.add(obs, a, Lesson.AVOID_ACTION)
 
             obs = next_obs
+            d2g = info["dist_to_goal"]
+            lap("reflection")
 
         # After episode ends: episode-level reflection for failure/success modes
-        reached_goal = (env.pos == env.goal)
+        reached_goal = (env.state == env.goal_state)
         if reached_goal: success = 1
 
-        if mode == "failure_only" and not reached_goal:
-            reflections += 1
-            s_idx = state_index_from_obs(obs, env.size)
-            mem.add(s_idx, 0, "avoid_action")
-        if mode == "success_only" and reached_goal:
-            reflections += 1
-            gx, gy = env.size-1, env.size-1
-            mem.add(gx*env.size+gy, 2, "avoid_action")
-            mem.add(gx*env.size+gy, 0, "avoid_action")
+        with phase("memory"):
+            if mode == "failure_only" and not reached_goal:
+                reflections += 1
+                mem.add(obs, 0, Lesson.AVOID_ACTION)
+            if mode == "success_only" and reached_goal:
+                reflections += 1
+                mem.add(env.goal_state, 2, Lesson.AVOID_ACTION)
+                mem.add(env.goal_state, 0, Lesson.AVOID_ACTION)
 
-        csv_writer.writerow({
+        yield {
             "mode": mode,
             "episode": ep,
             "success": success,
             "steps": steps,
             "return": total_r,
-            "reflections": reflections
-        })
+            "reflections": reflections,
+            "regret": opt_return - total_r
+        }
+
+class BatchedMemory:
+    """
+    ReflectionMemory for M independent lanes at once: per-lane FIFO ring buffers of
+    (state, action) AVOID_ACTION lessons, plus a dense (M, S, 4) bias tensor kept in step with
+    them while it fits in dense_mb. On bigger maps lookup() scans the M x capacity ring
+    buffers instead, so memory does not grow with the number of states.
+    """
+    def __init__(self, lanes, n_states, capacity=32, dense_mb=64):
+        self.capacity = capacity
+        self.bias = None
+        if lanes * n_states * 4 * 4 <= dense_mb * 2**20:
+            self.bias = np.zeros((lanes, n_states, 4), dtype=np.float32)  # multiples of 0.5: exact
+        self._states = np.zeros((lanes, capacity), dtype=np.int64)
+        self._actions = np.zeros((lanes, capacity), dtype=np.int64)
+        self._head = np.zeros(lanes, dtype=np.int64)
+        self._size = np.zeros(lanes, dtype=np.int64)
+
+    def lookup(self, lanes, states):
+        """(len(lanes), 4) action bias of each lane in its state."""
+        if self.bias is not None:
+            return self.bias[lanes, states]
+        hit = (self._states[lanes] == states[:, None]) & (np.arange(self.capacity) < self._size[lanes, None])
+        rows, slots = np.nonzero(hit)
+        out = np.zeros((len(lanes), 4), dtype=np.float32)
+        np.add.at(out, (rows, self._actions[lanes[rows], slots]), -AVOID_PENALTY)
+        return out
+
+    def add(self, lanes, states, actions):
+        """Add one lesson to each of the (distinct) `lanes`."""
+        slot = self._head[lanes]
+        if self.bias is not None:
+            full = self._size[lanes] == self.capacity
+            old = lanes[full]
+            self.bias[old, self._states[old, slot[full]], self._actions[old, slot[full]]] += AVOID_PENALTY
+            self.bias[lanes, states, actions] -= AVOID_PENALTY
+        self._states[lanes, slot] = states
+        self._actions[lanes, slot] = actions
+        self._head[lanes] = (slot + 1) % self.capacity
+        self._size[lanes] = np.minimum(self._size[lanes] + 1, self.capacity)
+
+def run_mode_batched(mode:str, env_cfg:dict, episodes:int, memory_capacity:int, eps:float, lanes:int,
+                     rng=None, memory_policy:str="fifo", timer=None):
+    """
+    Vectorized run_mode: `lanes` independent learners step in lockstep on a VecGridWorld, each
+    with its own memory and running every lanes-th episode in sequence (episode = k*lanes + lane + 1).
+    lanes=1 keeps one memory across all episodes like run_mode; lanes=episodes gives every
+    episode a fresh memory. Same rows as run_mode, but a different random stream.
+    """
+    return list(iter_mode_batched(mode, env_cfg, episodes, memory_capacity, eps, lanes, rng, memory_policy, timer))
+
+def iter_mode_batched(mode:str, env_cfg:dict, episodes:int, memory_capacity:int, eps:float, lanes:int,
+                      rng=None, memory_policy:str="fifo", timer=None):
+    """
+    run_mode_batched as a generator, yielding rows by episode number. Lanes finish episodes
+    out of order, so rows are held back until every earlier episode is done: a consumer that
+    stops early (adaptive budgets) sees an unbiased prefix, not the quickest episodes.
+    """
+    assert memory_policy == "fifo", "the batched engine only implements FIFO memory"
+    rng = np.random.default_rng() if rng is None else rng
+    phase = (timer or PhaseTimer()).phase
+    lanes = max(1, min(lanes, episodes))
+    env = make_env(env_cfg, num_envs=lanes, obs_mode="index")
+    S = env.size * env.size
+    mem = BatchedMemory(lanes, S, memory_capacity)
+    base_logits = np.log(env_policy_table(env) + 1e-9)
+    base_action = base_logits.argmax(axis=1)
+    opt_return = optimal_return(make_env(env_cfg, obs_mode="index"))
+    goal_state = env.goal_state
+
+    lane_ids = np.arange(lanes)
+    quota = (episodes - lane_ids + lanes - 1) // lanes  # episodes per lane
+    done_eps = np.zeros(lanes, dtype=np.int64)
+    steps = np.zeros(lanes, dtype=np.int64)
+    reflections = np.zeros(lanes, dtype=np.int64)
+    total_r = np.zeros(lanes)
+    pending = {}  # finished episodes waiting for an earlier one
+    next_ep = 1
 
-def run_experiment(cfg_path:str):
+    obs = env.reset()
+    while (done_eps < quota).any():
+        with phase("policy"):
+            explore = rng.random(lanes) < eps
+            rand_a = rng.integers(4, size=lanes)
+            if mode == "no_reflection":
+                greedy = base_action[obs]
+            else:
+                greedy = (base_logits[obs] + mem.lookup(lane_ids, obs)).argmax(axis=1)
+            a = np.where(explore, rand_a, greedy)
+
+        prev_obs = obs
+        with phase("env_step"):
+            obs, r, dones, info = env.step(a)
+        live = done_eps < quota  # lanes that finished their quota keep stepping but are ignored
+        total_r += r
+        steps += 1
+
+        if mode == "per_step":
+            reflections += 1
+            # record a simple "avoid" lesson when moving didn't change distance (heuristic)
+            worse = live & (info["dist_to_goal"] >= env.dist_to_goal[prev_obs])
+            if worse.any():
+                with phase("memory"):
+                    mem.add(lane_ids[worse], prev_obs[worse], a[worse])
+
+        ended = live & dones
+        if not ended.any():
+            continue
+        reached = info["state"] == goal_state
+        if mode == "failure_only":
+            fail = ended & ~reached
+            reflections += fail
+            if fail.any():
+                mem.add(lane_ids[fail], info["state"][fail], np.zeros(fail.sum(), dtype=np.int64))
+        if mode == "success_only":
+            succ = ended & reached
+            reflections += succ
+            if succ.any():
+                idx = lane_ids[succ]
+                mem.add(idx, np.full(len(idx), goal_state), np.full(len(idx), 2))
+                mem.add(idx, np.full(len(idx), goal_state), np.full(len(idx), 0))
+
+        idx = lane_ids[ended]
+        finished = list(zip(*((done_eps[idx] * lanes + idx + 1).tolist(), reached[idx].astype(np.int64).tolist(),
+                              steps[idx].tolist(), total_r[idx].tolist(), reflections[idx].tolist())))
+        done_eps[idx] += 1
+        steps[dones] = 0
+        reflections[dones] = 0
+        total_r[dones] = 0.0
+        for ep, sc, st, rt, rf in finished:
+            pending[ep] = {"mode": mode, "episode": ep, "success": sc, "steps": st, "return": rt,
+                           "reflections": rf, "regret": opt_return - rt}
+        while next_ep in pending:
+            yield pending.pop(next_ep)
+            next_ep += 1
+
+def _mode_stream(mode:str, cfg:dict):
+    """(row generator, phase timer) for one mode with its own seeded RNG stream."""
+    # each mode draws from its own stream keyed by its position in MODES, so its results
+    # don't depend on which other modes ran, in what order, or on how many workers
+    rng = make_rng(cfg["experiment"]["seed"], MODES.index(mode))
+    timer = PhaseTimer(enabled=cfg.get("profile", {}).get("enabled", False))
+    rcfg = cfg["reflect"]
+    args = (mode, cfg["env"], rcfg["episodes_per_mode"], rcfg["memory_capacity"], rcfg["exploration_eps"])
+    if rcfg.get("lanes"):
+        stream = iter_mode_batched(*args, rcfg["lanes"], rng=rng, memory_policy=rcfg.get("memory_policy", "fifo"), timer=timer)
+    else:
+        stream = iter_mode(*args, rng=rng, memory_policy=rcfg.get("memory_policy", "fifo"), timer=timer)
+    return stream, timer
+
+def _adaptive_cfg(cfg:dict):
+    acfg = cfg["reflect"].get("adaptive") or {}
+    return acfg if acfg.get("enabled", False) else None
+
+def _run_mode_seeded(mode:str, cfg:dict):
+    """Returns (rows, phase-timer summary); the summary is empty unless profile.enabled."""
+    stream, timer = _mode_stream(mode, cfg)
+    acfg = _adaptive_cfg(cfg)
+    if acfg is not None:
+        rows = run_adaptive({mode: stream}, cfg["reflect"]["episodes_per_mode"], acfg)[mode]
+    else:
+        rows = list(stream)
+    return rows, timer.summary(steps=sum(r["steps"] for r in rows))
+
+def _run_modes_compared(modes, cfg:dict):
+    """Adaptive run of all modes in lockstep (in-process), so they can stop once distinguishable."""
+    streams, timers = {}, {}
+    for mode in modes:
+        streams[mode], timers[mode] = _mode_stream(mode, cfg)
+    rows = run_adaptive(streams, cfg["reflect"]["episodes_per_mode"], _adaptive_cfg(cfg))
+    return [(rows[m], timers[m].summary(steps=sum(r["steps"] for r in rows[m]))) for m in modes]
+
+def run_experiment(cfg_path:str, workers:int=None, profile:bool=False, cprofile:bool=False, cache:bool=True):
     import yaml
     with open(cfg_path, "r") as f:
         cfg = yaml.safe_load(f)
+    prof_cfg = cfg.setdefault("profile", {})
+    prof_cfg["enabled"] = profile or prof_cfg.get("enabled", False)
+    if cprofile or prof_cfg.get("cprofile", False):
+        # cProfile only sees this process, so modes run in-process
+        run_profiled(run_config, os.path.join(cfg["experiment"]["output_dir"], "profile.pstats"), cfg, 1)
+    else:
+        # timing runs are never cached: their output is the measurement itself
+        cached_run("reflection_timing", cfg, lambda: run_config(cfg, workers), ["reflection_timing_metrics.csv"],
+                   enabled=cache and not prof_cfg["enabled"])
+
+def run_config(cfg:dict, workers:int=None):
+    """Run every mode in cfg["reflect"]["modes"], optionally one process per mode (reflect.workers)."""
     os.makedirs(cfg["experiment"]["output_dir"], exist_ok=True)
     out_csv = os.path.join(cfg["experiment"]["output_dir"], "reflection_timing_metrics.csv")
+    modes = cfg["reflect"]["modes"]
+    workers = workers or cfg["reflect"].get("workers", 1)
+    acfg = _adaptive_cfg(cfg)
+    if acfg is not None and acfg.get("compare", True) and len(modes) > 1:
+        # stopping depends on all modes at once, so they share one process
+        results = _run_modes_compared(modes, cfg)
+    elif workers <= 1:
+        results = [_run_mode_seeded(mode, cfg) for mode in modes]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(modes))) as pool:
+            results = list(pool.map(_run_mode_seeded, modes, [cfg] * len(modes)))
+
     with open(out_csv, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=["mode","episode","success","steps","return","reflections"])
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES + (STOP_FIELDS if acfg is not None else []))
         writer.writeheader()
-        for mode in cfg["reflect"]["modes"]:
-            run_mode(mode, cfg["env"], cfg["reflect"]["episodes_per_mode"],
-                     cfg["reflect"]["memory_capacity"], cfg["reflect"]["exploration_eps"], writer)
+        for rows, _ in results:  # config order, regardless of completion order
+            writer.writerows(rows)
     print(f"Done. Metrics saved to {out_csv}")
+    if acfg is not None:
+        used = ", ".join(f"{m}: {len(rows)} ({rows[0]['stop_reason'] if rows else 'budget'})"
+                         for m, (rows, _) in zip(modes, results))
+        print(f"Episodes used: {used}")
+
+    profiles = [{"mode": mode, **prof} for mode, (_, prof) in zip(modes, results) if prof]
+    if profiles:
+        prof_csv = os.path.join(cfg["experiment"]["output_dir"], "reflection_timing_profile.csv")
+        fields = list(dict.fromkeys(k for p in profiles for k in p))
+        with open(prof_csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, restval="")
+            writer.writeheader()
+            writer.writerows(profiles)
+        print(f"Per-phase timings saved to {prof_csv}")
 
 if __name__ == "__main__":
     import argparse
     p = argparse.ArgumentParser()
     p.add_argument("--config", type=str, required=True)
+    p.add_argument("--workers", type=int, default=None, help="run modes in parallel processes")
+    p.add_argument("--profile", action="store_true", help="write per-phase timings per mode")
+    p.add_argument("--cprofile", action="store_true", help="dump cProfile stats to <output_dir>/profile.pstats")
+    p.add_argument("--no-cache", action="store_true", help="always run, ignoring cached results")
     args = p.parse_args()
-    run_experiment(args.config)
+    run_experiment(args.config, args.workers, args.profile, args.cprofile, cache=not args.no_cache)
@@ -0,0 +1,146 @@
+"""
+Reflection encoders for the LAC. An encoder maps a list of reflections (str or Reflection
+records) to a (B, dim) array in one call, so a whole episode or rollout batch is encoded at
+once. make_encoder wraps it in an LRU cache keyed on reflection content: GridWorld produces
+the same few reflections over and over, so most lookups never reach the encoder.
+
+    lac:
+      encoder: features     # features | hashed_ngram
+      encoder_dim: 256      # hashed_ngram only
+      encoder_cache: 4096   # cached embeddings (0 = off)
+"""
+import zlib
+from collections import OrderedDict
+from typing import Sequence
+
+import numpy as np
+
+from srpi.lac.reflection import Reflection, text_features
+
+def content_key(reflection):
+    """Hashable key that is equal for reflections with the same text."""
+    if isinstance(reflection, Reflection):
+        r = reflection
+        return (r.action, r.reward, r.done, r.event, r.state)
+    return reflection
+
+class Encoder:
+    dim: int
+
+    def encode(self, reflections: Sequence) -> np.ndarray:
+        """(len(reflections), dim) float64 array."""
+        raise NotImplementedError
+
+class FeatureEncoder(Encoder):
+    """The hand-made text features: length/100, reached_goal, step_penalty."""
+    dim = 3
+
+    def encode(self, reflections):
+        return np.array([text_features(r) for r in reflections], dtype=np.float64).reshape(-1, self.dim)
+
+class HashedNgramEncoder(Encoder):
+    """
+    Word (or character) n-grams hashed into `dim` buckets with a random sign, sublinear term
+    frequency and L2 normalisation; optional IDF weights from fit(). No vocabulary or model
+    files, so it runs offline on CPU. crc32 keeps buckets stable across processes.
+    """
+    def __init__(self, dim: int = 256, ngram_range=(1, 2), analyzer: str = "word"):
+        if analyzer not in ("word", "char"):
+            raise ValueError(f"Unknown analyzer: {analyzer}")
+        self.dim = dim
+        self.ngram_range = tuple(ngram_range)
+        self.analyzer = analyzer
+        self.idf = None
+
+    def ngrams(self, text: str):
+        units = text.split() if self.analyzer == "word" else text
+        sep = " " if self.analyzer == "word" else ""
+        lo, hi = self.ngram_range
+        for n in range(lo, hi + 1):
+            for i in range(len(units) - n + 1):
+                yield sep.join(units[i:i + n])
+
+    def _buckets(self, text: str):
+        counts = {}
+        for g in self.ngrams(text):
+            h = zlib.crc32(g.encode())
+            counts[h] = counts.get(h, 0) + 1
+        h = np.fromiter(counts, dtype=np.int64, count=len(counts))
+        return h % self.dim, np.where(h & 0x80000000, -1.0, 1.0), np.fromiter(counts.values(), dtype=np.float64)
+
+    def fit(self, corpus: Sequence):
+        """Smoothed IDF per bucket from a corpus of reflections."""
+        df = np.zeros(self.dim)
+        for r in corpus:
+            df[np.unique(self._buckets(str(r))[0])] += 1
+        self.idf = np.log((1 + len(corpus)) / (1 + df)) + 1.0
+        return self
+
+    def encode(self, reflections):
+        out = np.zeros((len(reflections), self.dim))
+        for row, r in enumerate(reflections):
+            idx, sign, tf = self._buckets(str(r))
+            np.add.at(out[row], idx, sign * (1.0 + np.log(tf)))
+        if self.idf is not None:
+            out *= self.idf
+        norm = np.linalg.norm(out, axis=1, keepdims=True)
+        return np.divide(out, norm, out=out, where=norm > 0)
+
+class CachedEncoder(Encoder):
+    """
+    Bounded LRU cache of embeddings in front of another encoder. Each encode() looks up the
+    distinct keys of the batch and sends all misses to the wrapped encoder in one call.
+    """
+    def __init__(self, encoder: Encoder, maxsize: int = 4096):
+        self.encoder = encoder
+        self.dim = encoder.dim
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    def clear(self):
+        self._cache.clear()
+
+    def fit(self, corpus):
+        self.encoder.fit(corpus)
+        self.clear()
+        return self
+
+    def encode(self, reflections):
+        cache = self._cache
+        pos, uniq = {}, []
+        rows = [pos.setdefault(k, len(pos)) for k in map(content_key, reflections)]
+        missing = {}
+        for k, i in pos.items():
+            v = cache.get(k)
+            if v is None:
+                missing[k] = i
+            else:
+                cache.move_to_end(k)
+            uniq.append(v)
+        if missing:
+            first = {}
+            for r, i in zip(reflections, rows):
+                first.setdefault(i, r)
+            new = self.encoder.encode([first[i] for i in missing.values()])
+            for (k, i), v in zip(missing.items(), new):
+                uniq[i] = cache[k] = v
+            while len(cache) > self.maxsize:
+                cache.popitem(last=False)
+        self.hits += len(rows) - len(missing)
+        self.misses += len(missing)
+        if not uniq:
+            return np.zeros((0, self.dim))
+        return np.stack(uniq)[rows]
+
+ENCODERS = {"features": FeatureEncoder, "hashed_ngram": HashedNgramEncoder}
+
+def make_encoder(name: str = "features", cache_size: int = 4096, **kwargs) -> Encoder:
+    if name not in ENCODERS:
+        raise ValueError(f"Unknown encoder: {name}")
+    encoder = ENCODERS[name](**kwargs)
+    return CachedEncoder(encoder, cache_size) if cache_size else encoder
@@ -0,0 +1,83 @@
+from functools import lru_cache
+
+from srpi.envs.gridworld import ACTIONS
+
+@lru_cache(maxsize=1024)
+def _reward_text(reward: float) -> str:
+    return f"{reward:.2f}"
+
+class Reflection:
+    """
+    A reflection as a compact record (action, reward, done, flags) instead of a string.
+    Text is rendered only when asked for (str(r) / r.text, e.g. for logging or a text
+    encoder) and cached; len(r) is the length of that text, computed without building it.
+
+    event=None gives the per-step training format
+        "Action=<name> reward=<r> done=<d>[ reached_goal][ step_penalty]"
+    and an event name the reflection-timing format
+        "event=<e> state=<s> action=<a> reward=<r> done=<d>[ reached_goal][ step_penalty]"
+    (where reached_goal also requires done).
+    """
+    __slots__ = ("action", "reward", "done", "event", "state", "reached_goal", "step_penalty", "_text")
+
+    def __init__(self, action: int, reward: float, done: bool, event: str = None, state: int = None):
+        self.action = action
+        self.reward = reward
+        self.done = done
+        self.event = event
+        self.state = state
+        self.reached_goal = reward > 0 and (done or event is None)
+        self.step_penalty = reward < 0
+        self._text = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            r = _reward_text(self.reward)
+            if self.event is None:
+                base = f"Action={ACTIONS[self.action]} reward={r} done={self.done}"
+            else:
+                base = f"event={self.event} state={self.state} action={self.action} reward={r} done={self.done}"
+            if self.reached_goal:
+                base += " reached_goal"
+            if self.step_penalty:
+                base += " step_penalty"
+            self._text = base
+        return self._text
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"Reflection({self.text!r})"
+
+    def __len__(self):
+        if self._text is not None:
+            return len(self._text)
+        # fixed parts: "Action=" " reward=" " done=" (21 chars) / "event=" " state=" " action=" " reward=" " done=" (35)
+        n = 4 if self.done else 5
+        n += len(_reward_text(self.reward))
+        if self.event is None:
+            n += 21 + len(ACTIONS[self.action])
+        else:
+            n += 35 + len(self.event) + len(str(self.state)) + len(str(self.action))
+        return n + 13 * (self.reached_goal + self.step_penalty)
+
+    def __contains__(self, flag: str):
+        # substring checks on the rendered text, answered from the flags where possible
+        if flag == "reached_goal":
+            return self.reached_goal
+        if flag == "step_penalty":
+            return self.step_penalty
+        return flag in self.text
+
+def text_features(reflection):
+    # (length/100, has_goal, has_penalty); `reflection` is a str or a Reflection record,
+    # whose flags and length give the same values without any text
+    if isinstance(reflection, Reflection):
+        has_goal = 1.0 if reflection.reached_goal else 0.0
+        has_penalty = 1.0 if reflection.step_penalty else 0.0
+    else:
+        has_goal = 1.0 if "reached_goal" in reflection else 0.0
+        has_penalty = 1.0 if "step_penalty" in reflection else 0.0
+    return len(reflection)/100.0, has_goal, has_penalty
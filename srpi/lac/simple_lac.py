@@ -1,24 +1,46 @@
 import numpy as np
+from srpi.utils.checkpoint import Checkpointable
+from srpi.optim import make_optimizer
+from srpi.lac.encoders import FeatureEncoder
 
-class SimpleLAC:
+# step/50 and distance-to-goal/10 appended to every reflection embedding
+CONTEXT_DIM = 2
+
+class SimpleLAC(Checkpointable):
     """
-    A tiny stub mapping (reflection text length + local features) to an advantage estimate.
-    Replace with a real encoder for serious experiments.
+    A tiny MLP mapping (encoded reflection + local features) to an advantage estimate.
+    The encoder (srpi.lac.encoders; default: hand-made text features) sets the input size:
+    encoder.dim + CONTEXT_DIM. encode() builds the inputs for a whole batch of reflections,
+    which predict() / update() then take in one call.
     """
-    def __init__(self, input_dim: int, hidden: int = 64, lr: float = 1e-3, sigma_max: float = 1.0):
-        rng = np.random.default_rng(0)
-        self.W1 = rng.normal(scale=0.1, size=(input_dim, hidden))
-        self.b1 = np.zeros(hidden)
-        self.W2 = rng.normal(scale=0.1, size=(hidden, 2))  # mean, logvar
-        self.b2 = np.zeros(2)
-        self.lr = lr
+    def __init__(self, input_dim: int = None, hidden: int = 64, lr: float = 1e-3, sigma_max: float = 1.0, seed: int = 0,
+                 dtype="float64", optimizer: str = "sgd", optimizer_kwargs: dict = None, encoder=None):
+        rng = np.random.default_rng(seed)
+        self.dtype = np.dtype(dtype)
+        self.encoder = FeatureEncoder() if encoder is None else encoder
+        if input_dim is None:
+            input_dim = self.encoder.dim + CONTEXT_DIM
+        self.W1 = rng.normal(scale=0.1, size=(input_dim, hidden)).astype(self.dtype)
+        self.b1 = np.zeros(hidden, dtype=self.dtype)
+        self.W2 = rng.normal(scale=0.1, size=(hidden, 2)).astype(self.dtype)  # mean, logvar
+        self.b2 = np.zeros(2, dtype=self.dtype)
+        self.opt = make_optimizer(optimizer, self.state_dict(), lr, **(optimizer_kwargs or {}))
         self.sigma_max = sigma_max
 
+    def encode(self, reflections, steps, dist_to_goal):
+        """(B, input_dim) LAC inputs: encoded reflections, step/50 and distance-to-goal/10."""
+        emb = self.encoder.encode(reflections)
+        x = np.empty((len(emb), emb.shape[1] + CONTEXT_DIM), dtype=self.dtype)
+        x[:, :-CONTEXT_DIM] = emb
+        x[:, -2] = np.asarray(steps) / 50.0
+        x[:, -1] = np.asarray(dist_to_goal) / 10.0
+        return x
+
     def forward(self, x):
         h = np.tanh(x @ self.W1 + self.b1)
         out = h @ self.W2 + self.b2
-        mean = out[0]
-        logvar = out[1]
+        mean = out[..., 0]
+        logvar = out[..., 1]
         sigma2 = np.exp(logvar)
         return mean, sigma2, h
 
@@ -27,11 +49,28 @@ class SimpleLAC:
         return m, s2
 
     def update(self, xs, targets):
-        # simple heteroscedastic regression loss
-        dW1 = np.zeros_like(self.W1)
-        db1 = np.zeros_like(self.b1)
-        dW2 = np.zeros_like(self.W2)
-        db2 = np.zeros_like(self.b2)
+        # simple heteroscedastic regression loss, matrix form over the stacked (B, input_dim) batch
+        X = np.asarray(xs, dtype=self.dtype)
+        y = np.asarray(targets, dtype=self.dtype)
+        n = len(X)
+        m, s2, h = self.forward(X)
+        err = m - y
+        dout = np.empty((n, 2), dtype=self.dtype)
+        dout[:, 0] = err / (s2 + 1e-6)
+        dout[:, 1] = 0.5 * ((err**2) / (s2 + 1e-6) - 1.0)
+        dh = (1 - h**2) * (dout @ self.W2.T)
+
+        g = self.opt.grads
+        np.matmul(X.T, dh, out=g["W1"])
+        np.sum(dh, axis=0, out=g["b1"])
+        np.matmul(h.T, dout, out=g["W2"])
+        np.sum(dout, axis=0, out=g["b2"])
+        self.opt.step(n)
+
+    def update_per_sample(self, xs, targets):
+        # reference implementation of update(), one forward per sample
+        self.opt.zero_grad()
+        g = self.opt.grads
         n = len(xs)
         for x, y in zip(xs, targets):
             m, s2, h = self.forward(x)
@@ -41,14 +80,11 @@ class SimpleLAC:
             # d/dlogvar: 0.5*( (m-y)^2 / s2 - 1 )
             dlogv = 0.5 * (((m - y)**2) / (s2 + 1e-6) - 1.0)
 
-            dout = np.array([dm, dlogv])
-            dW2 += np.outer(h, dout)
-            db2 += dout
+            dout = np.array([dm, dlogv], dtype=self.dtype)
+            g["W2"] += np.outer(h, dout)
+            g["b2"] += dout
             dh = (1 - h**2) * (dout @ self.W2.T)
-            dW1 += np.outer(x, dh)
-            db1 += dh
+            g["W1"] += np.outer(x, dh)
+            g["b1"] += dh
 
-        self.W1 -= self.lr * dW1 / n
-        self.b1 -= self.lr * db1 / n
-        self.W2 -= self.lr * dW2 / n
-        self.b2 -= self.lr * db2 / n
+        self.opt.step(n)
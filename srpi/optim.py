@@ -0,0 +1,113 @@
+import numpy as np
+from typing import Dict
+
+class Optimizer:
+    """
+    In-place optimizer over a dict of parameter arrays. Owns one preallocated gradient buffer
+    per parameter (`grads`); models write per-batch gradient *sums* of the loss to minimize
+    into it and call step(n), which applies the mean gradient with `out=` ufuncs only.
+    """
+    def __init__(self, params: Dict[str, np.ndarray], lr: float):
+        self.params = params
+        self.lr = lr
+        self.grads = {k: np.zeros_like(p) for k, p in params.items()}
+
+    def zero_grad(self):
+        for g in self.grads.values():
+            g.fill(0)
+
+    def step(self, n: int = 1):
+        raise NotImplementedError
+
+    def state_dict(self) -> Dict[str, np.ndarray]:
+        return {}
+
+    def load_state_dict(self, state):
+        pass
+
+class SGD(Optimizer):
+    def step(self, n: int = 1):
+        lr = self.lr
+        for k, p in self.params.items():
+            g = self.grads[k]
+            # (lr * sum) / n, the same rounding as the original `p -= lr * grads / n`
+            np.multiply(g, lr, out=g)
+            np.divide(g, n, out=g)
+            np.subtract(p, g, out=p)
+
+class Momentum(Optimizer):
+    """Heavy-ball momentum: v = mu * v + mean_grad; p -= lr * v."""
+    def __init__(self, params, lr: float, momentum: float = 0.9):
+        super().__init__(params, lr)
+        self.momentum = momentum
+        self.velocity = {k: np.zeros_like(p) for k, p in params.items()}
+
+    def step(self, n: int = 1):
+        for k, p in self.params.items():
+            g, v = self.grads[k], self.velocity[k]
+            np.divide(g, n, out=g)
+            np.multiply(v, self.momentum, out=v)
+            np.add(v, g, out=v)
+            np.multiply(v, self.lr, out=g)
+            np.subtract(p, g, out=p)
+
+    def state_dict(self):
+        return {f"velocity.{k}": v for k, v in self.velocity.items()}
+
+    def load_state_dict(self, state):
+        for k, v in self.velocity.items():
+            v[...] = state[f"velocity.{k}"]
+
+class Adam(Optimizer):
+    def __init__(self, params, lr: float, betas=(0.9, 0.999), eps: float = 1e-8):
+        super().__init__(params, lr)
+        self.beta1, self.beta2 = betas
+        self.eps = eps
+        self.t = 0
+        self.m = {k: np.zeros_like(p) for k, p in params.items()}
+        self.v = {k: np.zeros_like(p) for k, p in params.items()}
+        self._tmp = {k: np.zeros_like(p) for k, p in params.items()}
+
+    def step(self, n: int = 1):
+        self.t += 1
+        b1, b2 = self.beta1, self.beta2
+        # bias corrections folded into the step size and eps
+        c1, c2 = 1.0 - b1 ** self.t, 1.0 - b2 ** self.t
+        step_size = self.lr * c2 ** 0.5 / c1
+        eps = self.eps * c2 ** 0.5
+        for k, p in self.params.items():
+            g, m, v, tmp = self.grads[k], self.m[k], self.v[k], self._tmp[k]
+            np.divide(g, n, out=g)
+            # v = b2 * v + (1 - b2) * g^2
+            np.multiply(g, g, out=tmp)
+            np.multiply(tmp, 1.0 - b2, out=tmp)
+            np.multiply(v, b2, out=v)
+            np.add(v, tmp, out=v)
+            # m = b1 * m + (1 - b1) * g
+            np.multiply(g, 1.0 - b1, out=g)
+            np.multiply(m, b1, out=m)
+            np.add(m, g, out=m)
+            # p -= step_size * m / (sqrt(v) + eps)
+            np.sqrt(v, out=tmp)
+            np.add(tmp, eps, out=tmp)
+            np.divide(m, tmp, out=tmp)
+            np.multiply(tmp, step_size, out=tmp)
+            np.subtract(p, tmp, out=p)
+
+    def state_dict(self):
+        return {"t": np.array(self.t), **{f"m.{k}": v for k, v in self.m.items()},
+                **{f"v.{k}": v for k, v in self.v.items()}}
+
+    def load_state_dict(self, state):
+        self.t = int(state["t"])
+        for k in self.params:
+            self.m[k][...] = state[f"m.{k}"]
+            self.v[k][...] = state[f"v.{k}"]
+
+OPTIMIZERS = {"sgd": SGD, "momentum": Momentum, "adam": Adam}
+
+def make_optimizer(name: str, params: Dict[str, np.ndarray], lr: float, **kwargs) -> Optimizer:
+    """Build an optimizer by name ("sgd" | "momentum" | "adam"); kwargs go to its constructor."""
+    if name not in OPTIMIZERS:
+        raise ValueError(f"unknown optimizer: {name}")
+    return OPTIMIZERS[name](params, lr, **kwargs)
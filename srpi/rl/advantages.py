@@ -0,0 +1,103 @@
+"""
+Vectorized discounted returns, GAE(lambda) and baselines over padded (num_envs, T) batches.
+
+Rows are time-major along the last axis. `dones[..., t] = 1` ends an episode after step t, so
+rows may hold one padded episode each (rewards past the end must be 0) or several
+back-to-back episodes from auto-resetting envs.
+"""
+import numpy as np
+
+try:  # fast path for the done-free case (scipy is in requirements.txt; the loops below are a fallback)
+    from scipy.signal import lfilter as _lfilter
+except ImportError:
+    _lfilter = None
+
+def discount_cumsum(x, gamma, dones=None):
+    """y[..., t] = x[..., t] + gamma * (1 - dones[..., t]) * y[..., t+1], along the last axis."""
+    x = np.asarray(x, dtype=float)
+    if dones is None:
+        if _lfilter is not None:
+            return _lfilter([1.0], [1.0, -gamma], x[..., ::-1], axis=-1)[..., ::-1].copy()
+        if x.ndim == 1:  # single episode: a float loop beats per-element array indexing
+            out, G = [], 0.0
+            for r in reversed(x.tolist()):
+                G = r + gamma * G
+                out.append(G)
+            return np.array(out[::-1])
+        notdone = np.ones(x.shape)
+    else:
+        notdone = 1.0 - np.asarray(dones, dtype=float)
+    # reverse scan over time, vectorized over the leading (env) axes
+    out = np.empty(x.shape)
+    running = np.zeros(x.shape[:-1])
+    for t in range(x.shape[-1] - 1, -1, -1):
+        running = x[..., t] + gamma * notdone[..., t] * running
+        out[..., t] = running
+    return out
+
+def discounted_returns(rewards, gamma, dones=None):
+    """Discounted return-to-go for every step of (..., T) rewards."""
+    return discount_cumsum(rewards, gamma, dones)
+
+def gae(rewards, values, gamma, lam, dones=None, last_values=None):
+    """
+    GAE(lambda) advantages and lambda-returns for (..., T) rewards/values.
+    last_values (...,) bootstraps rows cut off mid-episode; defaults to 0.
+    """
+    rewards = np.asarray(rewards, dtype=float)
+    values = np.asarray(values, dtype=float)
+    notdone = np.ones(rewards.shape) if dones is None else 1.0 - np.asarray(dones, dtype=float)
+    next_values = np.empty_like(values)
+    next_values[..., :-1] = values[..., 1:]
+    next_values[..., -1] = 0.0 if last_values is None else last_values
+    deltas = rewards + gamma * notdone * next_values - values
+    adv = discount_cumsum(deltas, gamma * lam, dones)
+    return adv, adv + values
+
+class RunningBaseline:
+    """Exponential moving average of mean returns, carried across updates."""
+    def __init__(self, momentum: float = 0.9):
+        self.momentum = momentum
+        self.value = None
+
+    def __call__(self, returns, mask=None):
+        batch_mean = _masked_mean(returns, mask)
+        b = batch_mean if self.value is None else self.value
+        self.value = batch_mean if self.value is None else self.momentum * self.value + (1 - self.momentum) * batch_mean
+        return b
+
+def subtract_baseline(returns, mask=None, baseline="episode"):
+    """
+    Advantages = returns - baseline over valid (mask) steps; padded steps get 0.
+    baseline: "episode" (per-row mean), "batch" (mean over all valid steps),
+    "none", or a callable such as RunningBaseline.
+    """
+    returns = np.asarray(returns, dtype=float)
+    if baseline == "none":
+        b = 0.0
+    elif baseline == "episode":
+        b = _masked_mean(returns, mask, axis=-1)[..., None]
+    elif baseline == "batch":
+        b = _masked_mean(returns, mask)
+    else:
+        b = baseline(returns, mask)
+    adv = returns - b
+    return adv if mask is None else np.where(mask, adv, 0.0)
+
+def pad_episodes(episodes, T=None):
+    """Stack a list of per-episode reward sequences into (N, T) rewards, dones and valid mask."""
+    T = T or max(len(ep) for ep in episodes)
+    rewards = np.zeros((len(episodes), T))
+    dones = np.zeros((len(episodes), T), dtype=bool)
+    mask = np.zeros((len(episodes), T), dtype=bool)
+    for i, ep in enumerate(episodes):
+        n = len(ep)
+        rewards[i, :n] = ep
+        dones[i, n - 1] = True
+        mask[i, :n] = True
+    return rewards, dones, mask
+
+def _masked_mean(x, mask=None, axis=None):
+    if mask is None:
+        return x.mean(axis=axis)
+    return np.where(mask, x, 0.0).sum(axis=axis) / np.maximum(mask.sum(axis=axis), 1)
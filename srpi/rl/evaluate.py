@@ -0,0 +1,42 @@
+import numpy as np
+
+from srpi.envs.gridworld import make_env
+
+class Evaluator:
+    """
+    Runs K evaluation episodes in lockstep on its own VecGridWorld (the training env is
+    left untouched). greedy=True takes argmax actions; otherwise actions are sampled from
+    the policy with the Gumbel-max trick. GridWorld is deterministic, so greedy episodes all
+    coincide: one is run and its result stands for all K, and only sampled evaluation has
+    spread. Observations are a function of the state, so each step runs one policy forward
+    per distinct state of the active episodes (at most size^2 rows) rather than one per
+    episode; cost then grows with K only through the env step and the Gumbel draws.
+    """
+    def __init__(self, env_cfg: dict, episodes: int = 5, greedy: bool = True):
+        self.episodes = episodes
+        self.greedy = greedy
+        self.env = make_env(env_cfg, num_envs=1 if greedy else episodes, autoreset=False)
+
+    def __call__(self, policy, rng=None):
+        env = self.env
+        env.reset()
+        returns = np.zeros(env.num_envs)
+        actions = np.zeros(env.num_envs, dtype=np.int64)
+        while not env.done.all():
+            active = np.flatnonzero(~env.done)
+            states, inverse = np.unique(env.state[active], return_inverse=True)
+            logits = policy.forward(env.obs_table[states])[0][inverse]
+            if not self.greedy:
+                logits = logits + (np.random if rng is None else rng).gumbel(size=logits.shape)
+            actions[active] = logits.argmax(axis=1)
+            _, r, _, _ = env.step(actions)
+            returns += r
+        success, steps = env.pos_at_goal(), env.t
+        if self.greedy:  # the one greedy episode, as K identical ones
+            returns, success, steps = (np.repeat(x, self.episodes) for x in (returns, success, steps))
+        return {
+            "eval_return_mean": float(returns.mean()),
+            "eval_return_std": float(returns.std()),
+            "eval_success_rate": float(success.mean()),
+            "eval_steps_mean": float(steps.mean()),
+        }
@@ -0,0 +1,56 @@
+import numpy as np
+
+from srpi.envs.gridworld import make_env
+
+class RolloutCollector:
+    """
+    Collects a batch of episodes in lockstep on one non-autoreset VecGridWorld: one batched
+    policy forward and one vectorized Gumbel-max draw per time step for all active envs.
+    Results are padded (num_envs, max_steps) arrays; `mask` marks the steps that happened.
+    Observations are kept as state indices (obs(states) expands them), so the buffers stay
+    O(num_envs * max_steps) whatever the obs size. dist_to_goal is that of each step's obs,
+    so LAC inputs can be encoded for the whole batch afterwards.
+    """
+    def __init__(self, env_cfg: dict, num_envs: int):
+        self.env = make_env(env_cfg, num_envs=num_envs, autoreset=False)
+        self.num_envs = num_envs
+        N, T = num_envs, self.env.max_steps
+        self.states = np.zeros((N, T), dtype=np.int64)
+        self.acts = np.zeros((N, T), dtype=np.int64)
+        self.rewards = np.zeros((N, T))
+        self.dist_to_goal = np.zeros((N, T), dtype=np.int64)
+        self._actions = np.zeros(N, dtype=np.int64)
+
+    def collect(self, policy, rng, num_episodes: int = None):
+        """
+        Run num_episodes (<= num_envs, default all) episodes to completion. Returns a dict of
+        views: states, acts, rewards, dist_to_goal, mask (n, T) and per-episode steps/return/success.
+        """
+        env, n = self.env, self.num_envs if num_episodes is None else num_episodes
+        obs = env.reset()
+        env.done[n:] = True  # unused envs stay frozen
+        self.rewards[:n] = 0.0
+        d2g = env.dist_to_goal[env.state]
+        for t in range(env.max_steps):
+            active = np.flatnonzero(~env.done)
+            if not len(active):
+                break
+            a = policy.sample_batch(obs[active], rng)
+            self._actions[active] = a
+            self.states[active, t] = env.state[active]
+            self.acts[active, t] = a
+            self.dist_to_goal[active, t] = d2g[active]
+            obs, r, _, info = env.step(self._actions)
+            self.rewards[active, t] = r[active]
+            d2g = info["dist_to_goal"]
+        steps = env.t[:n].copy()
+        rewards = self.rewards[:n]
+        return {
+            "states": self.states[:n], "acts": self.acts[:n], "rewards": rewards, "dist_to_goal": self.dist_to_goal[:n],
+            "mask": np.arange(env.max_steps) < steps[:, None],
+            "steps": steps, "return": rewards.sum(axis=1), "success": env.pos_at_goal()[:n],
+        }
+
+    def obs(self, states):
+        """Observation rows (float32, as the env returns them) for an array of state indices."""
+        return np.asarray(self.env.obs_table[states], dtype=np.float32)
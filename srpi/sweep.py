@@ -0,0 +1,118 @@
+"""
+Parallel multi-seed / multi-config sweeps.
+
+A sweep file names a base config, the task to run and a grid of dotted-key overrides:
+
+    base: configs/reflection_timing.yaml
+    task: reflection_timing        # or: train
+    output_dir: experiments/sweeps/reflection_timing
+    workers: 4
+    grid:
+      experiment.seed: [0, 1, 2, 3, 4]
+      reflect.memory_capacity: [8, 32]
+
+Every grid point runs in its own process and output dir (<output_dir>/run_XXX) and seeds
+its own RNG from experiment.seed, so results do not depend on the worker count.
+Rows from all runs are merged into <output_dir>/sweep_results.csv.
+"""
+import os, csv, argparse, itertools
+from concurrent.futures import ProcessPoolExecutor
+import yaml
+
+from srpi.utils.config import load_config, apply_overrides
+from srpi.utils.cache import cached_run
+from srpi.utils.logger import load_metrics
+
+TASKS = {
+    "train": "metrics.{backend}",
+    "reflection_timing": "reflection_timing_metrics.csv",
+}
+
+def output_file(task, cfg):
+    """Name of the metrics file `task` writes into its output dir (train follows log.backend)."""
+    return TASKS[task].format(backend=cfg.get("log", {}).get("backend", "csv"))
+
+def read_rows(path):
+    """Rows of a metrics file as dicts; empty/NaN cells of npz/parquet files become ""."""
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            return list(csv.DictReader(f))
+    df = load_metrics(path)
+    return df.astype(object).where(df.notna(), "").to_dict("records")
+
+def expand_grid(grid):
+    """Cartesian product of {dotted_key: [values]} -> list of override dicts (in key order)."""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+def _format(value):
+    return "+".join(map(str, value)) if isinstance(value, (list, tuple)) else value
+
+def run_one(task, cfg, use_cache=True):
+    if task == "train":
+        from srpi.train import train
+        run = lambda: train(cfg)
+    elif task == "reflection_timing":
+        from srpi.experiments.reflection_timing import run_config
+        run = lambda: run_config(cfg)
+    else:
+        raise ValueError(f"unknown sweep task: {task}")
+    out_name = output_file(task, cfg)
+    out_path = os.path.join(cfg["experiment"]["output_dir"], out_name)
+    # a re-run into the same run dir must not append to the previous run's rows
+    if os.path.exists(out_path):
+        os.remove(out_path)
+    # runs already done with the same config and code are restored from the result cache
+    cached_run(task, cfg, run, [out_name], enabled=use_cache)
+    return read_rows(out_path)
+
+def run_sweep(sweep_cfg, workers=None, use_cache=True):
+    task = sweep_cfg["task"]
+    base = load_config(sweep_cfg["base"])
+    out_dir = sweep_cfg["output_dir"]
+    workers = workers or sweep_cfg.get("workers", 1)
+    os.makedirs(out_dir, exist_ok=True)
+
+    points = expand_grid(sweep_cfg.get("grid", {}))
+    run_cfgs = []
+    for i, overrides in enumerate(points):
+        run_dir = os.path.join(out_dir, f"run_{i:03d}")
+        cfg = apply_overrides(base, {**overrides, "experiment.output_dir": run_dir})
+        os.makedirs(run_dir, exist_ok=True)
+        with open(os.path.join(run_dir, "config.yaml"), "w") as f:
+            yaml.safe_dump(cfg, f, sort_keys=False)
+        run_cfgs.append(cfg)
+
+    if workers <= 1:
+        results = [run_one(task, cfg, use_cache) for cfg in run_cfgs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_one, [task] * len(run_cfgs), run_cfgs, [use_cache] * len(run_cfgs)))
+
+    # merge in grid order; union of columns since train rows have varying schemas
+    merged, fieldnames = [], ["run"] + list(sweep_cfg.get("grid", {}))
+    for i, (overrides, rows) in enumerate(zip(points, results)):
+        tags = {"run": f"run_{i:03d}", **{k: _format(v) for k, v in overrides.items()}}
+        for row in rows:
+            for k in row:
+                if k not in fieldnames:
+                    fieldnames.append(k)
+            merged.append({**tags, **row})
+    out_csv = os.path.join(out_dir, "sweep_results.csv")
+    with open(out_csv, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=fieldnames, restval="")
+        w.writeheader()
+        w.writerows(merged)
+    print(f"Done. {len(points)} runs merged into {out_csv}")
+    return out_csv
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument("--sweep", type=str, required=True, help="sweep YAML (base, task, output_dir, grid)")
+    p.add_argument("--workers", type=int, default=None, help="overrides `workers` in the sweep file")
+    p.add_argument("--no-cache", action="store_true", help="re-run every grid point, ignoring cached results")
+    args = p.parse_args()
+    run_sweep(load_config(args.sweep), workers=args.workers, use_cache=not args.no_cache)
+
+if __name__ == "__main__":
+    main()
@@ -1,166 +1,291 @@
 import os, argparse, csv, json
 import numpy as np
 from srpi.utils.config import load_config
-from srpi.utils.misc import set_seed
-from srpi.utils.logger import CSVLogger
-from srpi.envs.gridworld import GridWorld, ACTIONS
+from srpi.utils.misc import set_seed, make_rng
+from srpi.utils.logger import make_logger
+from srpi.utils.profiling import PhaseTimer, run_profiled
+from srpi.utils.cache import cached_run
+from srpi.utils.checkpoint import save_checkpoint, load_checkpoint, rng_state, set_rng_state, prefixed, unprefixed
+from srpi.envs.gridworld import make_env, ACTIONS
+from srpi.envs.tabular import optimal_return
 from srpi.agents.policy import MLPPolicy
+from srpi.agents.buffer import TrajectoryBuffer
 from srpi.lac.simple_lac import SimpleLAC
-
-def discounted_returns(rewards, gamma):
-    G = 0.0
-    out = []
-    for r in reversed(rewards):
-        G = r + gamma * G
-        out.append(G)
-    return list(reversed(out))
+from srpi.lac.reflection import Reflection
+from srpi.lac.encoders import make_encoder
+from srpi.rl.advantages import discounted_returns, RunningBaseline
+from srpi.rl.evaluate import Evaluator
+from srpi.rl.rollout import RolloutCollector
 
 def make_reflection(obs, act, next_obs, reward, done):
-    # A stub "reflection" string
-    base = f"Action={ACTIONS[act]} reward={reward:.2f} done={done}"
-    if reward > 0: base += " reached_goal"
-    elif reward < 0: base += " step_penalty"
-    return base
-
-def reflection_features(reflection:str, step:int, dist_to_goal:float):
-    # Very simple numeric features derived from text metadata
-    length = len(reflection)
-    has_goal = 1.0 if "reached_goal" in reflection else 0.0
-    has_penalty = 1.0 if "step_penalty" in reflection else 0.0
-    return np.array([length/100.0, has_goal, has_penalty, step/50.0, dist_to_goal/10.0], dtype=np.float32)
-
-def dist_to_goal_from_obs(obs_flat, size):
-    idx = int(np.argmax(obs_flat))
-    x, y = divmod(idx, size)
-    gx, gy = size-1, size-1
-    return abs(gx - x) + abs(gy - y)
+    # A stub reflection; a structured record whose text is only rendered on demand (str())
+    return Reflection(act, reward, done)
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--config", type=str, required=True)
-    args = parser.parse_args()
-    cfg = load_config(args.config)
+def save_train_state(path, ep, policy, lac, rng, logger, running_baseline=None):
+    logger.flush()  # logger position must match what is on disk
+    state = {"episode": ep, "logger_rows": logger.n_rows, "rng": rng_state(rng),
+             **prefixed("policy", policy.state_dict()), **prefixed("lac", lac.state_dict()),
+             **prefixed("policy_opt", policy.opt.state_dict()), **prefixed("lac_opt", lac.opt.state_dict())}
+    if running_baseline is not None and running_baseline.value is not None:
+        state["running_baseline"] = running_baseline.value
+    save_checkpoint(path, state)
+
+def load_train_state(path, policy, lac, rng, logger, running_baseline=None):
+    """Restore a checkpoint written by save_train_state; returns the last completed episode."""
+    state = load_checkpoint(path)
+    policy.load_state_dict(unprefixed("policy", state))
+    lac.load_state_dict(unprefixed("lac", state))
+    policy.opt.load_state_dict(unprefixed("policy_opt", state))
+    lac.opt.load_state_dict(unprefixed("lac_opt", state))
+    set_rng_state(rng, state["rng"])
+    logger.truncate(int(state["logger_rows"]))  # drop rows logged after the checkpoint
+    if running_baseline is not None and "running_baseline" in state:
+        running_baseline.value = float(state["running_baseline"])
+    return int(state["episode"])
+
+def optimizer_args(section):
+    """(name, kwargs) for make_optimizer from an agent/lac config section."""
+    kwargs = {k: section[k] for k in ("momentum", "betas", "eps") if k in section}
+    return section.get("optimizer", "sgd"), kwargs
 
+def make_lac_encoder(section):
+    """Reflection encoder (with its embedding cache) from the lac config section."""
+    name = section.get("encoder", "features")
+    kwargs = {"dim": section["encoder_dim"]} if name != "features" and "encoder_dim" in section else {}
+    return make_encoder(name, cache_size=section.get("encoder_cache", 4096), **kwargs)
+
+def train(cfg, resume=False):
     exp_dir = cfg["experiment"]["output_dir"]
     os.makedirs(exp_dir, exist_ok=True)
-    set_seed(cfg["experiment"]["seed"])
+    seed = cfg["experiment"]["seed"]
+    set_seed(seed)
+    # run-local RNG so parallel sweep workers stay reproducible
+    rng = make_rng(seed)
 
     # Env
-    env = GridWorld(size=cfg["env"]["size"],
-                    start=tuple(cfg["env"]["start"]),
-                    goal=tuple(cfg["env"]["goal"]),
-                    step_penalty=cfg["env"]["step_penalty"],
-                    goal_reward=cfg["env"]["goal_reward"],
-                    max_steps=cfg["env"]["max_steps"])
-    obs_dim = env.size * env.size
+    env = make_env(cfg["env"])
+    if env.obs_mode == "index":
+        raise ValueError("train.py needs vector observations: set env.obs_mode to onehot or coords")
+    obs_dim = env.obs_dim
     act_dim = len(ACTIONS)
 
+    # network numerics for policy and LAC (weights, gradients, LAC features)
+    dtype = np.dtype(cfg["train"].get("dtype", "float64"))
+
     # Agent
+    policy_opt, policy_opt_kwargs = optimizer_args(cfg["agent"])
     policy = MLPPolicy(obs_dim, act_dim,
                        hidden=cfg["agent"]["policy_hidden"],
                        lr=cfg["train"]["lr"],
                        entropy_coef=cfg["agent"]["entropy_coef"],
-                       kl_coef=cfg["agent"]["kl_coef"])
+                       kl_coef=cfg["agent"]["kl_coef"],
+                       seed=seed, dtype=dtype,
+                       optimizer=policy_opt, optimizer_kwargs=policy_opt_kwargs)
 
     # LAC
     lac_enabled = cfg["lac"]["enabled"]
     alpha = cfg["lac"]["alpha"]
     sigma_max = cfg["lac"]["sigma_max"]
-    lac = SimpleLAC(input_dim=5, hidden=cfg["lac"]["hidden"], lr=cfg["lac"]["lr"], sigma_max=sigma_max)
+    lac_opt, lac_opt_kwargs = optimizer_args(cfg["lac"])
+    lac = SimpleLAC(hidden=cfg["lac"]["hidden"], lr=cfg["lac"]["lr"], sigma_max=sigma_max, seed=seed,
+                    dtype=dtype, optimizer=lac_opt, optimizer_kwargs=lac_opt_kwargs,
+                    encoder=make_lac_encoder(cfg["lac"]))
+    # text the LAC sees per step: "posthoc" (a fixed placeholder) or "step" (that step's reflection)
+    lac_text = cfg["lac"].get("reflection", "posthoc")
+    if lac_text not in ("posthoc", "step"):
+        raise ValueError(f"Unknown lac.reflection: {lac_text}")
 
-    logger = CSVLogger(os.path.join(exp_dir, "metrics.csv"))
+    log_cfg = cfg.get("log", {})
+    logger = make_logger(exp_dir, "metrics", backend=log_cfg.get("backend", "csv"),
+                         **{k: log_cfg[k] for k in ("flush_every", "flush_secs") if k in log_cfg})
     ep_count = cfg["train"]["episodes"]
     gamma = cfg["agent"]["gamma"]
+    # "episode": mean return of the current episode; "running": EMA across episodes
+    running_baseline = RunningBaseline() if cfg["agent"].get("baseline", "episode") == "running" else None
+
+    buf = TrajectoryBuffer(env.max_steps, obs_dim, feat_dim=lac.W1.shape[0], dtype=dtype)
+    opt_return = optimal_return(env)  # exact DP optimum, for regret
+    evaluator = Evaluator(cfg["env"], episodes=cfg["train"].get("eval_episodes", 5),
+                          greedy=cfg["train"].get("eval_greedy", True))
+
+    timer = PhaseTimer(enabled=cfg.get("profile", {}).get("enabled", False))
+    phase, lap = timer.phase, timer.lap
+    total_steps = 0
+
+    ckpt_path = os.path.join(exp_dir, "checkpoint.npz")
+    ckpt_every = cfg["train"].get("checkpoint_every", 0)
+    start_ep = 1
+    if resume and os.path.exists(ckpt_path):
+        start_ep = load_train_state(ckpt_path, policy, lac, rng, logger, running_baseline) + 1
+        print(f"Resuming from episode {start_ep} ({ckpt_path})")
+    else:
+        # a fresh run (or one with no checkpoint to continue) starts a new metrics file
+        logger.reset()
+        if resume:
+            print(f"No checkpoint at {ckpt_path}; starting from episode 1")
+
+    log_every, eval_every = cfg["train"]["log_every"], cfg["train"]["eval_every"]
+    # train.rollout_envs > 1: collect that many episodes in lockstep and update once per batch
+    n_envs = cfg["train"].get("rollout_envs", 1)
+    collector = None
+    if n_envs > 1:
+        collector = RolloutCollector(cfg["env"], n_envs)
+
+    ep = start_ep - 1  # last completed episode
+    while ep < ep_count:
+        if collector is None:
+            ep += 1
+            obs = env.reset()
+            done = False
+            buf.reset()
+            d2g_obs = int(env.dist_to_goal[env.state])
+            d2gs = []  # distance to goal of each step's obs (not next_obs)
+            t = 0
+            total_r = 0.0
+
+            lap()
+            while not done:
+                a, logp, probs, logits = policy.sample(obs, rng)
+                lap("policy_sample")
+                next_obs, r, done, info = env.step(a)
+                lap("env_step")
+                total_r += r
+
+                reflection = make_reflection(obs, a, next_obs, r, done)
+                d2gs.append(d2g_obs)
+                lap("reflection")
+                buf.add(obs, a, r, None, reflection)
+
+                obs = next_obs
+                d2g_obs = info["dist_to_goal"]
+                t += 1
+                lap("buffer")
+            total_steps += t
+
+            # LAC inputs for the whole episode in one encoder call; reused below
+            with phase("lac_encode"):
+                texts = buf.reflections if lac_text == "step" else ["posthoc"] * t
+                buf.set_feats(lac.encode(texts, np.arange(t), d2gs))
 
-    for ep in range(1, ep_count+1):
-        obs = env.reset()
-        done = False
-
-        ep_obs, ep_acts, ep_rewards, ep_advs_env = [], [], [], []
-        lac_xs, lac_targets = [], []
-        t = 0
-        total_r = 0.0
-
-        while not done:
-            a, logp, probs, logits = policy.sample(obs)
-            next_obs, r, done, info = env.step(a)
-            total_r += r
-
-            reflection = make_reflection(obs, a, next_obs, r, done)
-            d2g = dist_to_goal_from_obs(next_obs, env.size)
-            x = reflection_features(reflection, t, d2g)
-            m, s2 = lac.predict(x)
-
-            ep_obs.append(obs.copy())
-            ep_acts.append(a)
-            ep_rewards.append(r)
-
-            obs = next_obs
-            t += 1
-
-        # compute env advantages
-        rets = discounted_returns(ep_rewards, gamma)
-        baseline = np.mean(rets)
-        env_advs = [G - baseline for G in rets]
-
-        # train LAC on env advantages (supervision)
-        for i in range(len(env_advs)):
-            # re-construct features for each step
-            # (we recompute; in a real codebase you'd store them)
-            # Approx dist_to_goal from stored obs->next_obs; here use obs since next not stored.
-            d2g = dist_to_goal_from_obs(ep_obs[i], env.size)
-            refl = "posthoc"  # placeholder
-            x = reflection_features(refl, i, d2g)
-            lac_xs.append(x)
-            lac_targets.append(env_advs[i])
-        if lac_enabled:
-            lac.update(lac_xs, lac_targets)
-
-        # blended advantage
-        blended = []
-        for i in range(len(env_advs)):
-            d2g = dist_to_goal_from_obs(ep_obs[i], env.size)
-            refl = "posthoc"
-            x = reflection_features(refl, i, d2g)
-            m, s2 = lac.predict(x)
-            use_lac = 1.0 if (lac_enabled and s2 <= sigma_max) else 0.0
-            adv = alpha * m * use_lac + (1.0 - alpha) * env_advs[i]
-            blended.append(adv)
-
-        policy.update(ep_obs, ep_acts, blended)
-
-        if ep % cfg["train"]["log_every"] == 0:
-            logger.log({
-                "episode": ep,
-                "return": total_r,
-                "steps": t,
-                "baseline": baseline,
-                "mean_env_adv": float(np.mean(env_advs)),
-                "mean_blended_adv": float(np.mean(blended)),
-            })
-
-        if ep % cfg["train"]["eval_every"] == 0:
-            # quick greedy eval
-            eval_returns = []
-            for _ in range(5):
-                obs = env.reset()
-                done = False
-                R = 0.0
-                steps = 0
-                while not done:
-                    probs, logits = policy.policy(obs)
-                    a = int(np.argmax(probs))
-                    obs, r, done, _ = env.step(a)
-                    R += r
-                    steps += 1
-                eval_returns.append(R)
-            logger.log({
-                "episode": ep,
-                "eval_return_mean": float(np.mean(eval_returns)),
-                "eval_return_std": float(np.std(eval_returns))
-            })
-
-    print(f"Done. Metrics at {os.path.join(exp_dir, 'metrics.csv')}")
+            # compute env advantages
+            with phase("advantages"):
+                rets = discounted_returns(buf.rewards, gamma)
+                baseline = running_baseline(rets) if running_baseline else np.mean(rets)
+                env_advs = rets - baseline
+
+            # train LAC on env advantages (supervision)
+            if lac_enabled:
+                with phase("lac_update"):
+                    lac.update(buf.feats, env_advs)
+
+            # gate + blend with the (updated) critic in one pass over the episode
+            with phase("lac_predict"):
+                buf.set_lac(*lac.predict(buf.feats))
+            use_lac = (buf.lac_var <= sigma_max) if lac_enabled else np.zeros(len(buf), dtype=bool)
+            blended = alpha * buf.lac_mean * use_lac + (1.0 - alpha) * env_advs
+
+            with phase("policy_update"):
+                policy.update(buf.obs, buf.acts, blended)
+
+            if ep % log_every == 0:
+                with phase("logging"):
+                    logger.log({
+                        "episode": ep,
+                        "return": total_r,
+                        "regret": opt_return - total_r,
+                        "steps": t,
+                        "baseline": baseline,
+                        "mean_env_adv": float(np.mean(env_advs)),
+                        "mean_blended_adv": float(np.mean(blended)),
+                    })
+        else:
+            # batches end exactly on eval/checkpoint episodes so both fire at the usual counts
+            n = min(n_envs, ep_count - ep, *(k - ep % k for k in (eval_every, ckpt_every) if k))
+            first, ep = ep + 1, ep + n
+            lap()
+            batch = collector.collect(policy, rng, n)
+            lap("rollout")
+            mask, steps = batch["mask"], batch["steps"]
+            total_steps += int(steps.sum())
+
+            with phase("advantages"):
+                rets = discounted_returns(batch["rewards"], gamma)
+                # per-episode mean return over its own steps, or the running EMA
+                baseline = (np.full(n, running_baseline(rets, mask)) if running_baseline
+                            else (rets * mask).sum(axis=1) / steps)
+                env_advs = (rets - baseline[:, None])[mask]  # flat, episode after episode
+            obs_b, acts_b = collector.obs(batch["states"][mask]), batch["acts"][mask]
+
+            with phase("lac_encode"):
+                t_idx = np.nonzero(mask)[1]
+                if lac_text == "step":
+                    done_b = (t_idx == np.repeat(steps - 1, steps)).tolist()
+                    texts = [Reflection(a, r, d) for a, r, d in
+                             zip(acts_b.tolist(), batch["rewards"][mask].tolist(), done_b)]
+                else:
+                    texts = ["posthoc"] * len(t_idx)
+                feats = lac.encode(texts, t_idx, batch["dist_to_goal"][mask])
+
+            if lac_enabled:
+                with phase("lac_update"):
+                    lac.update(feats, env_advs)
+            with phase("lac_predict"):
+                lac_mean, lac_var = lac.predict(feats)
+            use_lac = (lac_var <= sigma_max) if lac_enabled else np.zeros(len(feats), dtype=bool)
+            blended = alpha * lac_mean * use_lac + (1.0 - alpha) * env_advs
+
+            with phase("policy_update"):
+                policy.update(obs_b, acts_b, blended)
+
+            with phase("logging"):
+                offsets = np.concatenate(([0], np.cumsum(steps)[:-1]))
+                adv_means = np.add.reduceat(env_advs, offsets) / steps
+                blended_means = np.add.reduceat(blended, offsets) / steps
+                for i, e in enumerate(range(first, ep + 1)):
+                    if e % log_every == 0:
+                        total_r = float(batch["return"][i])
+                        logger.log({
+                            "episode": e,
+                            "return": total_r,
+                            "regret": opt_return - total_r,
+                            "steps": int(steps[i]),
+                            "baseline": float(baseline[i]),
+                            "mean_env_adv": float(adv_means[i]),
+                            "mean_blended_adv": float(blended_means[i]),
+                        })
+
+        if ep % eval_every == 0:
+            with phase("eval"):
+                logger.log({"episode": ep, **evaluator(policy, rng)})
+
+        if ckpt_every and ep % ckpt_every == 0:
+            with phase("checkpoint"):
+                save_train_state(ckpt_path, ep, policy, lac, rng, logger, running_baseline)
+
+    if timer.enabled:
+        # one summary row: per-phase seconds / call counts and env steps per second
+        logger.log({"episode": ep_count, **timer.summary(steps=total_steps)})
+    logger.close()
+    print(f"Done. Metrics at {logger.path}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", type=str, required=True)
+    parser.add_argument("--resume", action="store_true", help="continue from <output_dir>/checkpoint.npz")
+    parser.add_argument("--profile", action="store_true", help="log per-phase timings (profile.enabled)")
+    parser.add_argument("--cprofile", action="store_true", help="dump cProfile stats to <output_dir>/profile.pstats")
+    parser.add_argument("--no-cache", action="store_true", help="always train, ignoring cached results")
+    args = parser.parse_args()
+    cfg = load_config(args.config)
+    prof_cfg = cfg.setdefault("profile", {})
+    prof_cfg["enabled"] = args.profile or prof_cfg.get("enabled", False)
+    if args.cprofile or prof_cfg.get("cprofile", False):
+        run_profiled(train, os.path.join(cfg["experiment"]["output_dir"], "profile.pstats"), cfg, resume=args.resume)
+    else:
+        # resumed and profiled runs always execute
+        metrics = f"metrics.{cfg.get('log', {}).get('backend', 'csv')}"
+        cached_run("train", cfg, lambda: train(cfg, resume=args.resume), [metrics],
+                   enabled=not (args.no_cache or args.resume or prof_cfg["enabled"]))
 
 if __name__ == "__main__":
     main()
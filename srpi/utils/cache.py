@@ -0,0 +1,147 @@
+"""
+Content-addressed on-disk cache of experiment results.
+
+An entry is keyed by a SHA-256 of the task name, the resolved config (minus settings that do
+not change results: output_dir, worker counts, the cache section; an env.map file is
+replaced by its rows) and a hash of the srpi source code, so any code change invalidates
+old entries. Entries are directories holding the
+run's result files; they are written to a temp dir and renamed into place, so parallel
+workers never see a partial entry, and the least recently used ones are evicted once the
+cache grows past max_mb.
+
+    cache:
+      enabled: true
+      dir: ~/.cache/srpi      # or $SRPI_CACHE_DIR
+      max_mb: 1024
+"""
+import copy, hashlib, json, os, shutil, time, uuid
+from functools import lru_cache
+from typing import Callable, Dict, List
+
+import srpi
+from srpi.envs.maps import map_rows
+
+# config keys that only say where/how fast to run, not what is computed
+IGNORED_KEYS = ("experiment.output_dir", "reflect.workers", "cache")
+
+@lru_cache(maxsize=None)
+def code_version() -> str:
+    """SHA-256 over every srpi/*.py file (path and contents)."""
+    root = os.path.dirname(os.path.abspath(srpi.__file__))
+    h = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.endswith(".py"):
+                path = os.path.join(dirpath, name)
+                h.update(os.path.relpath(path, root).encode())
+                with open(path, "rb") as f:
+                    h.update(f.read())
+    return h.hexdigest()
+
+def config_key(task: str, cfg: Dict) -> str:
+    cfg = copy.deepcopy(cfg)
+    for key in IGNORED_KEYS:
+        *parents, leaf = key.split(".")
+        node = cfg
+        for k in parents:
+            node = node.get(k, {}) if isinstance(node, dict) else {}
+        if isinstance(node, dict):
+            node.pop(leaf, None)
+    env = cfg.get("env")
+    if isinstance(env, dict) and isinstance(env.get("map"), str):
+        # a map file changes results without changing the config: hash its rows, not its path
+        env["map"] = map_rows(env["map"])
+    blob = json.dumps({"task": task, "config": cfg, "code": code_version()}, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+class ResultCache:
+    def __init__(self, root: str = None, max_mb: float = 1024):
+        root = root or os.environ.get("SRPI_CACHE_DIR") or os.path.join("~", ".cache", "srpi")
+        self.root = os.path.expanduser(root)
+        self.max_bytes = int(max_mb * 2**20)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key: str, files: List[str], dest_dir: str) -> bool:
+        """Copy the cached files into dest_dir; False on a miss (or if the entry was evicted meanwhile)."""
+        entry = self._entry(key)
+        if not os.path.isdir(entry):
+            return False
+        os.makedirs(dest_dir, exist_ok=True)
+        try:
+            for name in files:
+                tmp = os.path.join(dest_dir, f".{name}.{uuid.uuid4().hex}.tmp")
+                shutil.copyfile(os.path.join(entry, name), tmp)
+                os.replace(tmp, os.path.join(dest_dir, name))
+            os.utime(entry)  # mark as recently used
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put(self, key: str, files: List[str], src_dir: str, meta: Dict = None):
+        entry = self._entry(key)
+        if os.path.isdir(entry):
+            return
+        tmp = os.path.join(self.root, f"tmp-{os.getpid()}-{uuid.uuid4().hex}")
+        os.makedirs(tmp)
+        for name in files:
+            shutil.copyfile(os.path.join(src_dir, name), os.path.join(tmp, name))
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump({"created": time.time(), **(meta or {})}, f, default=str)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        try:
+            os.rename(tmp, entry)  # atomic; fails if another worker stored the same key first
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def entries(self):
+        """(last-used time, size in bytes, path) of every entry."""
+        out = []
+        for shard in os.scandir(self.root):
+            if not shard.is_dir() or shard.name.startswith("tmp-"):
+                continue
+            for e in os.scandir(shard.path):
+                try:
+                    size = sum(f.stat().st_size for f in os.scandir(e.path))
+                    out.append((e.stat().st_mtime, size, e.path))
+                except FileNotFoundError:  # evicted by another process
+                    continue
+        return out
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+def cached_run(task: str, cfg: Dict, run: Callable[[], None], files: List[str], enabled: bool = True):
+    """
+    Restore `files` (names inside cfg's output_dir) from the cache if this (task, config, code)
+    already ran; otherwise call run() and store them. Returns True on a cache hit.
+    """
+    cache_cfg = cfg.get("cache", {})
+    if not (enabled and cache_cfg.get("enabled", True)):
+        run()
+        return False
+    out_dir = cfg["experiment"]["output_dir"]
+    cache = ResultCache(cache_cfg.get("dir"), cache_cfg.get("max_mb", 1024))
+    key = config_key(task, cfg)
+    if cache.get(key, files, out_dir):
+        print(f"Cache hit ({key[:12]}): restored {', '.join(files)} in {out_dir}")
+        return True
+    # leftovers from an earlier run in out_dir must not end up in the entry
+    for name in files:
+        path = os.path.join(out_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+    run()
+    cache.put(key, files, out_dir, meta={"task": task})
+    return False
@@ -0,0 +1,59 @@
+import json, os
+from typing import Any, Dict
+import numpy as np
+
+def save_checkpoint(path: str, arrays: Dict[str, Any]):
+    """Write arrays to a single .npz, atomically (tmp file + rename), so a crash never leaves a torn file."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+
+def load_checkpoint(path: str) -> Dict[str, np.ndarray]:
+    with np.load(path) as data:
+        return {k: data[k] for k in data.files}
+
+def rng_state(rng: np.random.Generator) -> np.ndarray:
+    """Generator state as a 0-d string array (bit generator states hold arbitrary-size ints)."""
+    return np.array(json.dumps(rng.bit_generator.state))
+
+def set_rng_state(rng: np.random.Generator, state: np.ndarray):
+    rng.bit_generator.state = json.loads(str(state))
+
+def prefixed(prefix: str, arrays: Dict[str, Any]) -> Dict[str, Any]:
+    return {f"{prefix}.{k}": v for k, v in arrays.items()}
+
+def unprefixed(prefix: str, arrays: Dict[str, Any]) -> Dict[str, Any]:
+    n = len(prefix) + 1
+    return {k[n:]: v for k, v in arrays.items() if k.startswith(prefix + ".")}
+
+class Checkpointable:
+    """
+    Parameter access and save/load for the two-layer networks (MLPPolicy, SimpleLAC): the
+    arrays named in PARAMS plus an optimizer `opt` built over state_dict().
+    """
+    PARAMS = ("W1", "b1", "W2", "b2")
+
+    @property
+    def lr(self):
+        return self.opt.lr
+
+    @lr.setter
+    def lr(self, value):
+        self.opt.lr = value
+
+    def state_dict(self):
+        return {k: getattr(self, k) for k in self.PARAMS}
+
+    def load_state_dict(self, state):
+        # copy in place so anything holding references to the parameter arrays stays valid
+        for k in self.PARAMS:
+            getattr(self, k)[...] = state[k]
+
+    def save(self, path: str):
+        save_checkpoint(path, self.state_dict())
+
+    def load(self, path: str):
+        self.load_state_dict(load_checkpoint(path))
+        return self
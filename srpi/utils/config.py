@@ -1,3 +1,4 @@
+import copy
 import yaml
 from dataclasses import dataclass
 from typing import Any, Dict
@@ -5,3 +6,14 @@ from typing import Any, Dict
 def load_config(path: str) -> Dict[str, Any]:
     with open(path, "r") as f:
         return yaml.safe_load(f)
+
+def apply_overrides(cfg: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a deep copy of cfg with dotted-key overrides applied, e.g. {"lac.alpha": 0.25}."""
+    out = copy.deepcopy(cfg)
+    for key, value in overrides.items():
+        node = out
+        *parents, leaf = key.split(".")
+        for k in parents:
+            node = node.setdefault(k, {})
+        node[leaf] = value
+    return out
@@ -1,22 +1,313 @@
-import csv, json, os, time
-from typing import Dict, Any
+import atexit, csv, json, os, time
+from typing import Dict, Any, List
 
 class CSVLogger:
-    def __init__(self, csv_path: str):
-        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
-        self.csv_path = csv_path
-        self.fieldnames = None
+    """
+    Buffered CSV logger. Rows are kept in memory and written every `flush_every` rows or
+    `flush_secs` seconds, and on close()/process exit. Columns may differ from row to row:
+    the header is the union of all keys seen (missing cells are left empty), and the file is
+    rewritten once with the wider header whenever a new key appears.
+    Appends to an existing file, continuing with its header.
+    """
+    def __init__(self, csv_path: str, flush_every: int = 1000, flush_secs: float = 5.0):
+        os.makedirs(os.path.dirname(csv_path) or ".", exist_ok=True)
+        self.path = self.csv_path = csv_path
+        self.flush_every = flush_every
+        self.flush_secs = flush_secs
+        self.fieldnames: List[str] = []
+        self.n_rows = 0  # data rows in the file (written + buffered)
+        if os.path.exists(csv_path):
+            with open(csv_path, newline="") as f:
+                r = csv.reader(f)
+                self.fieldnames = next(r, [])
+                self.n_rows = sum(1 for _ in r)
+        self._buffer: List[Dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+        atexit.register(self.close)
 
     def log(self, row: Dict[str, Any]):
-        if self.fieldnames is None:
-            self.fieldnames = list(row.keys())
-            write_header = not os.path.exists(self.csv_path)
-            with open(self.csv_path, "a", newline="") as f:
-                w = csv.DictWriter(f, fieldnames=self.fieldnames)
-                if write_header:
-                    w.writeheader()
-                w.writerow(row)
+        self._buffer.append(row)
+        self.n_rows += 1
+        if len(self._buffer) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_secs:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        new_keys = {}
+        for row in self._buffer:
+            for k in row:
+                if k not in new_keys and k not in self.fieldnames:
+                    new_keys[k] = None
+        if new_keys:
+            self._widen_header(list(new_keys))
+        with open(self.csv_path, "a", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=self.fieldnames, restval="")
+            w.writerows(self._buffer)
+        self._buffer = []
+
+    def truncate(self, n_rows: int):
+        """Drop everything after the first n_rows data rows (used when resuming from a checkpoint)."""
+        self._buffer = []
+        if not os.path.exists(self.csv_path):
+            self.n_rows = 0
+            return
+        tmp = self.csv_path + ".tmp"
+        with open(self.csv_path, newline="") as src, open(tmp, "w", newline="") as dst:
+            r = csv.reader(src)
+            w = csv.writer(dst)
+            for i, rec in enumerate(r):
+                if i > n_rows:
+                    break
+                w.writerow(rec)
+        os.replace(tmp, self.csv_path)
+        self.n_rows = min(n_rows, self.n_rows)
+
+    def reset(self):
+        """Delete the file and any buffered rows, so the next row starts a new file."""
+        self._buffer = []
+        self.fieldnames = []
+        self.n_rows = 0
+        if os.path.exists(self.csv_path):
+            os.remove(self.csv_path)
+
+    def _widen_header(self, new_keys: List[str]):
+        old = self.fieldnames
+        self.fieldnames = old + new_keys
+        if not old or not os.path.exists(self.csv_path):
+            with open(self.csv_path, "w", newline="") as f:
+                csv.writer(f).writerow(self.fieldnames)
+            return
+        # rare (once per new column): rewrite existing rows under the wider header
+        tmp = self.csv_path + ".tmp"
+        with open(self.csv_path, newline="") as src, open(tmp, "w", newline="") as dst:
+            r = csv.reader(src)
+            w = csv.writer(dst)
+            next(r, None)
+            w.writerow(self.fieldnames)
+            pad = [""] * len(new_keys)
+            for rec in r:
+                w.writerow(rec + pad)
+        os.replace(tmp, self.csv_path)
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.close)  # the atexit hook would otherwise keep this logger alive
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ColumnarLogger:
+    """
+    Columnar metrics logger writing one array per column to `.npz` (or `.parquet` via pandas).
+    Only rows since the last flush are held in memory: each flush writes them to the next
+    numbered part file in <path>.parts/ (cost proportional to the new rows), and close()
+    merges the existing file and all parts into <path> atomically, column by column for npz.
+    Rows missing a column get NaN (numeric) or "". Appends to an existing file and parts.
+    """
+    def __init__(self, path: str, flush_every: int = 100_000, flush_secs: float = 30.0):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.parts_dir = path + ".parts"
+        self.backend = "parquet" if path.endswith(".parquet") else "npz"
+        self.flush_every = flush_every
+        self.flush_secs = flush_secs
+        self.columns: Dict[str, list] = {}  # buffered (unflushed) rows only
+        self._n_buffered = 0
+        parts = self._parts()
+        self._next_part = int(os.path.basename(parts[-1])[5:-4]) + 1 if parts else 0
+        self.n_rows = sum(n for _, n in self._sources())  # rows on disk + buffered
+        self._last_flush = time.monotonic()
+        atexit.register(self.close)
+
+    def log(self, row: Dict[str, Any]):
+        for k, v in row.items():
+            col = self.columns.get(k)
+            if col is None:
+                col = self.columns[k] = [_missing(v)] * self._n_buffered
+            col.append(v)
+        self._n_buffered += 1
+        self.n_rows += 1
+        if len(row) < len(self.columns):
+            for col in self.columns.values():
+                if len(col) < self._n_buffered:
+                    col.append(_missing(col[0]))
+        if self._n_buffered >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_secs:
+            self.flush()
+
+    def _parts(self) -> List[str]:
+        if not os.path.isdir(self.parts_dir):
+            return []
+        names = sorted(n for n in os.listdir(self.parts_dir) if n.startswith("part-") and n.endswith(".npz"))
+        return [os.path.join(self.parts_dir, n) for n in names]
+
+    def _sources(self):
+        """(path, rows) of the merged file (if any) followed by every part, in order."""
+        import numpy as np
+        out = []
+        if os.path.exists(self.path):
+            if self.backend == "parquet":
+                out.append((self.path, len(load_metrics(self.path))))
+            else:
+                with np.load(self.path) as data:
+                    out.append((self.path, len(data[data.files[0]]) if data.files else 0))
+        for part in self._parts():
+            with np.load(part) as data:
+                out.append((part, len(data[data.files[0]]) if data.files else 0))
+        return out
+
+    def flush(self):
+        """Write buffered rows to a new part file."""
+        self._last_flush = time.monotonic()
+        if not self._n_buffered:
+            return
+        import numpy as np
+        os.makedirs(self.parts_dir, exist_ok=True)
+        path = os.path.join(self.parts_dir, f"part-{self._next_part:06d}.npz")
+        self._next_part += 1
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, **{k: np.asarray(v) for k, v in self.columns.items()})
+        os.replace(path + ".tmp", path)
+        self.columns = {}
+        self._n_buffered = 0
+
+    def _merge(self, keep: int = None):
+        """Merge the file and all parts into self.path (first `keep` rows only, if given)."""
+        import numpy as np
+        sources = self._sources()
+        if not any(p != self.path for p, _ in sources) and keep is None:
+            return
+        parquet_src = self.path if self.backend == "parquet" and os.path.exists(self.path) else None
+        if parquet_src:
+            base = load_metrics(parquet_src)
+        names = {}
+        for p, _ in sources:
+            if p == parquet_src:
+                names.update(dict.fromkeys(base.columns))
+            else:
+                with np.load(p) as data:
+                    names.update(dict.fromkeys(data.files))
+
+        def column(name):
+            pieces = []
+            for p, n in sources:
+                if p == parquet_src:
+                    pieces.append(base[name].to_numpy() if name in base.columns else n)
+                else:
+                    with np.load(p) as data:
+                        pieces.append(data[name] if name in data.files else n)
+            example = next(x for x in pieces if not isinstance(x, int))
+            fill = "" if example.dtype.kind in "US" else float("nan")
+            arr = np.concatenate([np.full(x, fill) if isinstance(x, int) else x for x in pieces])
+            return arr if keep is None else arr[:keep]
+
+        tmp = self.path + ".tmp"
+        if self.backend == "parquet":
+            import pandas as pd
+            pd.DataFrame({name: column(name) for name in names}).to_parquet(tmp, index=False)
         else:
-            with open(self.csv_path, "a", newline="") as f:
-                w = csv.DictWriter(f, fieldnames=self.fieldnames)
-                w.writerow(row)
+            import zipfile
+            # same layout as np.savez, but holding one column in memory at a time
+            with zipfile.ZipFile(tmp, "w", zipfile.ZIP_STORED, allowZip64=True) as zf:
+                for name in names:
+                    with zf.open(name + ".npy", "w", force_zip64=True) as f:
+                        np.lib.format.write_array(f, column(name), allow_pickle=False)
+        os.replace(tmp, self.path)
+        for p in self._parts():
+            os.remove(p)
+        if os.path.isdir(self.parts_dir):
+            os.rmdir(self.parts_dir)
+        self._next_part = 0
+
+    def truncate(self, n_rows: int):
+        """Keep only the first n_rows rows on disk (used when resuming from a checkpoint)."""
+        self.columns = {}
+        self._n_buffered = 0
+        if self._sources():
+            self._merge(keep=n_rows)
+        self.n_rows = sum(n for _, n in self._sources())
+
+    def reset(self):
+        """Delete the file, its parts and any buffered rows, so the next row starts a new file."""
+        self.columns = {}
+        self._n_buffered = 0
+        self.n_rows = 0
+        for p in self._parts() + [self.path]:
+            if os.path.exists(p):
+                os.remove(p)
+        if os.path.isdir(self.parts_dir):
+            os.rmdir(self.parts_dir)
+        self._next_part = 0
+
+    def close(self):
+        self.flush()
+        self._merge()
+        self.columns = {}
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _missing(example):
+    return "" if isinstance(example, str) else float("nan")
+
+def make_logger(out_dir: str, name: str = "metrics", backend: str = "csv", **kwargs):
+    """Logger for <out_dir>/<name>.<ext>; backend is "csv", "npz" or "parquet"."""
+    if backend == "csv":
+        return CSVLogger(os.path.join(out_dir, f"{name}.csv"), **kwargs)
+    if backend in ("npz", "parquet"):
+        return ColumnarLogger(os.path.join(out_dir, f"{name}.{backend}"), **kwargs)
+    raise ValueError(f"unknown log backend: {backend}")
+
+def load_metrics(path: str):
+    """Load a metrics file written by any backend (.csv, .npz, .parquet) as a pandas DataFrame."""
+    import pandas as pd
+    if path.endswith(".npz"):
+        import numpy as np
+        with np.load(path) as data:
+            return pd.DataFrame({k: data[k] for k in data.files})
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+def iter_metrics(path: str, chunksize: int = 100_000, columns=None):
+    """
+    Yield a metrics file (.csv, .npz, .parquet) as DataFrame chunks of at most `chunksize` rows,
+    for aggregating files too large for load_metrics. `columns` limits what is read; names
+    missing from the file are ignored.
+    """
+    import pandas as pd
+    wanted = None if columns is None else set(columns)
+    if path.endswith(".npz"):
+        import numpy as np
+        with np.load(path) as data:
+            # npz members load one column at a time, so only the requested columns are held
+            cols = {k: data[k] for k in data.files if wanted is None or k in wanted}
+        n = len(next(iter(cols.values()), []))
+        for i in range(0, n, chunksize):
+            yield pd.DataFrame({k: v[i:i + chunksize] for k, v in cols.items()})
+        return
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            df = pd.read_parquet(path, columns=list(columns) if columns is not None else None)
+            for i in range(0, len(df), chunksize):
+                yield df.iloc[i:i + chunksize]
+            return
+        pf = pq.ParquetFile(path)
+        names = [c for c in pf.schema_arrow.names if wanted is None or c in wanted]
+        for batch in pf.iter_batches(batch_size=chunksize, columns=names):
+            yield batch.to_pandas()
+        return
+    usecols = None if wanted is None else (lambda c: c in wanted)
+    yield from pd.read_csv(path, chunksize=chunksize, usecols=usecols)
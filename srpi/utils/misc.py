@@ -4,3 +4,7 @@ def set_seed(seed: int):
     import random, os
     random.seed(seed)
     np.random.seed(seed)
+
+def make_rng(seed: int, *keys: int) -> np.random.Generator:
+    """Independent Generator for (seed, *keys); unaffected by the global NumPy RNG."""
+    return np.random.default_rng([seed, *keys])
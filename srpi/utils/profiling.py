@@ -0,0 +1,97 @@
+"""
+Opt-in hot-path instrumentation: per-phase wall-clock totals and call counts.
+
+    timer = PhaseTimer(enabled=True)
+    with timer.phase("update"):     # coarse blocks
+        model.update(batch)
+    lap = timer.lap                  # per-step hot loops: time since the previous mark
+    lap()                            # start the clock
+    env.step(a); lap("env_step")
+    timer.summary(steps=n)  # {"time_env_step": ..., "calls_env_step": ..., "steps_per_sec": ...}
+
+When disabled, phase() hands back one shared no-op context manager and lap is a no-op
+function, so hot loops pay one trivial call per mark.
+"""
+import cProfile, os, time
+from typing import Any, Callable, Dict
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+class _Phase:
+    __slots__ = ("total", "calls", "_t0")
+
+    def __init__(self):
+        self.total = 0.0
+        self.calls = 0
+        self._t0 = 0.0
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.total += time.perf_counter() - self._t0
+        self.calls += 1
+        return False
+
+def _no_lap(name: str = None):
+    pass
+
+class PhaseTimer:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.phases: Dict[str, _Phase] = {}
+        self._start = self._mark = time.perf_counter()
+        self.lap = self._lap if enabled else _no_lap
+
+    def _lap(self, name: str = None):
+        """Charge the time since the previous mark to `name` (no name: just restart the clock)."""
+        now = time.perf_counter()
+        if name is not None:
+            p = self.phases.get(name)
+            if p is None:
+                p = self.phases[name] = _Phase()
+            p.total += now - self._mark
+            p.calls += 1
+        self._mark = now
+
+    def phase(self, name: str):
+        if not self.enabled:
+            return _NULL_PHASE
+        p = self.phases.get(name)
+        if p is None:
+            p = self.phases[name] = _Phase()
+        return p
+
+    def summary(self, steps: int = None) -> Dict[str, Any]:
+        """Per-phase totals (seconds) and call counts, plus wall time and steps/sec since creation."""
+        if not self.enabled:
+            return {}
+        wall = time.perf_counter() - self._start
+        out = {"time_wall": wall}
+        for name, p in self.phases.items():
+            out[f"time_{name}"] = p.total
+            out[f"calls_{name}"] = p.calls
+        if steps is not None:
+            out["total_steps"] = steps
+            out["steps_per_sec"] = steps / wall if wall > 0 else float("nan")
+        return out
+
+def run_profiled(fn: Callable, pstats_path: str, *args, **kwargs):
+    """Run fn(*args, **kwargs) under cProfile and dump the stats to pstats_path."""
+    os.makedirs(os.path.dirname(pstats_path) or ".", exist_ok=True)
+    prof = cProfile.Profile()
+    try:
+        return prof.runcall(fn, *args, **kwargs)
+    finally:
+        prof.dump_stats(pstats_path)
+        print(f"cProfile stats saved to {pstats_path}")
@@ -0,0 +1,154 @@
+"""
+Streaming statistics for metrics files too large to load at once: running mean/variance
+(Welford, merged across chunks with Chan et al.'s formula), per-group stats over DataFrame
+chunks, a binned learning curve that coarsens its bins to stay under a fixed size, and
+Wilson score intervals for success rates.
+"""
+from statistics import NormalDist
+import numpy as np
+from typing import Dict, Sequence, Tuple
+
+Z95 = 1.959963984540054
+
+def z_value(confidence: float = 0.95, tests: int = 1) -> float:
+    """Two-sided normal quantile for `confidence`, Bonferroni-corrected over `tests` intervals."""
+    return NormalDist().inv_cdf(1.0 - (1.0 - confidence) / (2 * max(tests, 1)))
+
+def wilson_interval(successes, n, z=Z95):
+    """(low, high) Wilson score interval of a binomial proportion; (0, 1) for n == 0."""
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    z2 = z * z
+    centre = (p + z2 / (2 * n)) / (1 + z2 / n)
+    half = z * np.sqrt(p * (1 - p) / n + z2 / (4 * n * n)) / (1 + z2 / n)
+    return float(max(centre - half, 0.0)), float(min(centre + half, 1.0))
+
+def merge_moments(n_a, mean_a, m2_a, n_b, mean_b, m2_b):
+    """Combine (count, mean, sum of squared deviations) of two samples; works on arrays."""
+    n = n_a + n_b
+    with np.errstate(invalid="ignore", divide="ignore"):
+        delta = mean_b - mean_a
+        frac = np.where(n > 0, n_b / np.maximum(n, 1), 0.0)
+        mean = mean_a + delta * frac
+        m2 = m2_a + m2_b + delta * delta * n_a * frac
+    return n, mean, m2
+
+class RunningStats:
+    """Count, mean and variance of a stream of values; NaNs are skipped."""
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self):
+        self.n, self.mean, self.m2 = 0, 0.0, 0.0
+
+    def update(self, values):
+        x = np.asarray(values, dtype=float).ravel()
+        x = x[~np.isnan(x)]
+        if len(x):
+            mean = x.mean()
+            self.merge(len(x), mean, float(((x - mean) ** 2).sum()))
+        return self
+
+    def push(self, x: float):
+        """Welford update with one value (cheaper than update() for per-episode streams)."""
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        return self
+
+    def merge(self, n, mean, m2):
+        n, mean, m2 = merge_moments(self.n, self.mean, self.m2, n, mean, m2)
+        self.n, self.mean, self.m2 = int(n), float(mean), float(m2)
+        return self
+
+    @property
+    def var(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else float("nan")
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.var))
+
+    @property
+    def sem(self):
+        return self.std / np.sqrt(self.n) if self.n > 1 else float("nan")
+
+    def ci(self, z=Z95):
+        """Half-width of the normal-approximation confidence interval of the mean."""
+        return z * self.sem
+
+class GroupedStats:
+    """RunningStats per (group key, column), fed DataFrame chunks one at a time."""
+    def __init__(self, by, columns: Sequence[str]):
+        self.by = by
+        self.columns = list(columns)
+        self.stats: Dict[Tuple, Dict[str, RunningStats]] = {}
+
+    def update(self, chunk):
+        g = chunk.groupby(self.by, sort=False)[self.columns]
+        counts, means, m2s = g.count(), g.mean(), g.var(ddof=0) * g.count()
+        for key in counts.index:
+            cols = self.stats.setdefault(key, {c: RunningStats() for c in self.columns})
+            for c in self.columns:
+                n = int(counts.at[key, c])
+                if n:
+                    cols[c].merge(n, float(means.at[key, c]), float(m2s.at[key, c]))
+        return self
+
+    def frame(self, stat="mean"):
+        """DataFrame of one statistic ("mean", "std", "sem", "n", ...) per group, sorted by key."""
+        import pandas as pd
+        rows = {key: {c: getattr(s, stat) for c, s in cols.items()} for key, cols in self.stats.items()}
+        df = pd.DataFrame.from_dict(rows, orient="index").sort_index()
+        df.index.name = self.by if isinstance(self.by, str) else None
+        return df
+
+class BinnedCurve:
+    """
+    y-statistics per x-bin (e.g. return per episode) in bounded memory. Bins start one
+    unit wide; whenever more than `max_bins` are needed the width doubles and neighbouring
+    bins are merged, so a file with fewer than max_bins episodes keeps one bin per episode.
+    """
+    def __init__(self, max_bins: int = 2000):
+        self.max_bins = max_bins
+        self.width = 1
+        self.n = np.zeros(0)
+        self.mean = np.zeros(0)
+        self.m2 = np.zeros(0)
+
+    def _coarsen(self):
+        if len(self.n) % 2:
+            self.n, self.mean, self.m2 = (np.append(a, 0.0) for a in (self.n, self.mean, self.m2))
+        self.n, self.mean, self.m2 = merge_moments(self.n[0::2], self.mean[0::2], self.m2[0::2],
+                                                   self.n[1::2], self.mean[1::2], self.m2[1::2])
+        self.width *= 2
+
+    def update(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        keep = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[keep].astype(np.int64), y[keep]
+        if not len(x):
+            return self
+        while x.max() // self.width >= self.max_bins:
+            self._coarsen()
+        b = x // self.width
+        size = max(len(self.n), int(b.max()) + 1)
+        cnt = np.bincount(b, minlength=size).astype(float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(cnt > 0, np.bincount(b, y, minlength=size) / np.maximum(cnt, 1), 0.0)
+        m2 = np.bincount(b, (y - mean[b]) ** 2, minlength=size)
+        pad = size - len(self.n)
+        if pad:
+            self.n, self.mean, self.m2 = (np.append(a, np.zeros(pad)) for a in (self.n, self.mean, self.m2))
+        self.n, self.mean, self.m2 = merge_moments(self.n, self.mean, self.m2, cnt, mean, m2)
+        return self
+
+    def curve(self, z=Z95):
+        """(x, mean, ci half-width) for non-empty bins; x is the bin centre, ci is NaN for n < 2."""
+        idx = np.nonzero(self.n)[0]
+        n, mean, m2 = self.n[idx], self.mean[idx], self.m2[idx]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sem = np.where(n > 1, np.sqrt(m2 / np.maximum(n - 1, 1) / n), np.nan)
+        return idx * self.width + (self.width - 1) / 2, mean, z * sem